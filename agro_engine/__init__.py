@@ -0,0 +1,54 @@
+"""Pricing and analytics engine behind the Agro Grain Export Calculator.
+
+The package can be used without Streamlit::
+
+    from agro_engine import price_container
+    results = price_container({"Basmati Rice": {"quantity": 20, "unit_price": 950}},
+                              transport=2400, packing=150, fumigation=80, customs=300,
+                              duty=5, margin=15, distributor_margin=10, retailer_margin=20)
+
+Names are resolved on first use, so importing the package costs nothing and
+each caller only pays for the submodules (NumPy, pandas, SQLite, ReportLab)
+it actually touches.  ``python -m agro_engine`` runs the command line tool.
+"""
+import importlib
+
+_EXPORTS = {
+    "price_arrays": "pricing",
+    "price_container": "pricing",
+    "reprice_estimate": "pricing",
+    "price_batch": "batch",
+    "read_batch_file": "batch",
+    "split_batch": "batch",
+    "estimate_records": "batch",
+    "EstimateStore": "store",
+    "EstimateAggregates": "aggregates",
+    "EstimateTable": "records",
+    "LineTable": "analytics",
+    "ProductCatalog": "catalog",
+    "export_history": "history_io",
+    "import_history": "history_io",
+    "ForecastEngine": "forecasting",
+    "FreightRates": "freight",
+    "RateTable": "freight",
+    "build_estimate_pdf": "reports",
+    "write_reports_zip": "reports",
+    "simulate": "scenarios",
+    "solve_max_price": "solver",
+    "buying_grid": "solver",
+    "quote": "api",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,109 @@
+"""Running dashboard aggregates.
+
+``EstimateAggregates`` is updated as estimates are added, change status or
+are deleted, so the Dashboard reads its figures in O(1) instead of rescanning
+history on every Streamlit rerun.  ``rebuild``/``verify`` recompute
+everything from the stored rows when the running totals need checking.
+"""
+import math
+
+
+class EstimateAggregates:
+    """Counts and sums over all estimates, overall and per status / destination."""
+
+    def __init__(self):
+        self.count = 0
+        self.margin_sum = 0.0
+        self.total_value = 0.0
+        self.by_status = {}
+        self.by_destination = {}
+
+    @classmethod
+    def from_groups(cls, groups):
+        """Build from ``(status, destination, count, total_value, margin_sum)`` group rows."""
+        aggregates = cls()
+        aggregates.add_groups(groups)
+        return aggregates
+
+    # ---- updates --------------------------------------------------------
+
+    def add_groups(self, groups):
+        """Add pre-summed ``(status, destination, count, total_value, margin_sum)`` rows."""
+        for status, destination, count, total_value, margin_sum in groups:
+            self._apply(status, destination, count, total_value or 0.0, margin_sum or 0.0)
+
+    def add(self, estimate):
+        self._apply(*_key(estimate), 1, *_values(estimate))
+
+    def remove(self, estimate):
+        value, margin = _values(estimate)
+        self._apply(*_key(estimate), -1, -value, -margin)
+
+    def change_status(self, estimate, new_status):
+        """Move ``estimate`` (carrying its old status) to ``new_status``."""
+        self.remove(estimate)
+        self.add(dict(estimate, status=new_status))
+
+    def _apply(self, status, destination, count, value, margin):
+        self.count += count
+        self.total_value += value
+        self.margin_sum += margin
+        for table, key in ((self.by_status, status), (self.by_destination, destination)):
+            bucket = table.setdefault(key, {"count": 0, "total_value": 0.0, "margin_sum": 0.0})
+            bucket["count"] += count
+            bucket["total_value"] += value
+            bucket["margin_sum"] += margin
+            if bucket["count"] == 0:
+                del table[key]
+
+    # ---- reads ----------------------------------------------------------
+
+    @property
+    def avg_margin(self):
+        return self.margin_sum / self.count if self.count else 0.0
+
+    def status_count(self, status):
+        return self.by_status.get(status, {}).get("count", 0)
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "active": self.status_count("active"),
+            "avg_margin": self.avg_margin,
+            "total_value": self.total_value,
+            "by_status": {k: dict(v) for k, v in self.by_status.items()},
+            "by_destination": {k: dict(v) for k, v in self.by_destination.items()},
+        }
+
+    def differences(self, other, rel_tol=1e-9, abs_tol=1e-6):
+        """List the figures where ``self`` and ``other`` disagree (sums compared with tolerance)."""
+        diffs = []
+
+        def compare(name, a, b):
+            if isinstance(a, int) and isinstance(b, int):
+                same = a == b
+            else:
+                same = math.isclose(a, b, rel_tol=rel_tol, abs_tol=abs_tol)
+            if not same:
+                diffs.append(f"{name}: {a!r} != {b!r}")
+
+        compare("count", self.count, other.count)
+        compare("total_value", self.total_value, other.total_value)
+        compare("margin_sum", self.margin_sum, other.margin_sum)
+        for label, mine, theirs in (("status", self.by_status, other.by_status),
+                                    ("destination", self.by_destination, other.by_destination)):
+            for key in sorted(set(mine) | set(theirs), key=str):
+                empty = {"count": 0, "total_value": 0.0, "margin_sum": 0.0}
+                a, b = mine.get(key, empty), theirs.get(key, empty)
+                for field in ("count", "total_value", "margin_sum"):
+                    compare(f"{label}[{key}].{field}", a[field], b[field])
+        return diffs
+
+
+def _key(estimate):
+    return estimate.get("status", "active"), estimate.get("destination", "")
+
+
+def _values(estimate):
+    results = estimate.get("results") or {}
+    return float(results.get("total_value") or 0.0), float(results.get("margin") or 0.0)
@@ -0,0 +1,101 @@
+"""Columnar analytics for the Business Intelligence screen.
+
+``LineTable`` holds one row per estimate-product line, loaded from the store
+once and then extended with only the lines added since.  Aggregations are
+grouped, vectorized pandas operations cached under the table's version, so a
+rerun with no new data costs a dictionary lookup.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+
+class LineTable:
+    """Flattened estimate-line table kept in step with an ``EstimateStore``."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._frame = None
+        self._mutations = None
+        self._last_line_id = 0
+        self._cache = {}
+
+    @property
+    def version(self):
+        return self._mutations, self._last_line_id
+
+    def frame(self):
+        """Return the up-to-date line table."""
+        return self.snapshot()[0]
+
+    def snapshot(self):
+        """Return the up-to-date line table and the version it belongs to, read together."""
+        with self._lock:
+            self._refresh()
+            return self._frame, self.version
+
+    def _refresh(self):
+        if self._frame is None or self._mutations != self.store.mutations:
+            # Updates and deletes can touch any row, so reload from scratch
+            self._mutations = self.store.mutations
+            frame = self.store.lines_frame()
+        else:
+            new_lines = self.store.lines_frame(after_line_id=self._last_line_id)
+            if new_lines.empty:
+                return
+            frame = _concat_lines(self._frame, new_lines)
+        self._frame = frame
+        self._last_line_id = int(frame["line_id"].max()) if not frame.empty else 0
+        self._cache = {}
+
+    def _cached(self, name, compute):
+        # Refresh, key and compute under one lock hold, so a result is never filed under a newer version
+        with self._lock:
+            self._refresh()
+            key = (name, self.version)
+            if key not in self._cache:
+                self._cache[key] = compute(self._frame)
+            return self._cache[key]
+
+    # ---- aggregations ---------------------------------------------------
+
+    def revenue_by_product(self):
+        """Total line value per product, largest first."""
+        return self._cached("revenue_by_product", lambda df: (
+            df.groupby("product", observed=True)["line_value"].sum()
+            .sort_values(ascending=False)
+            .rename_axis("Product").reset_index(name="Total Revenue")))
+
+    def revenue_trend(self):
+        """Retail price of all estimates summed per estimate date."""
+        def compute(df):
+            estimates = df.drop_duplicates("estimate_id")
+            return (estimates.groupby("date")["retail_price"].sum()
+                    .rename_axis("Date").reset_index(name="Retail Price"))
+        return self._cached("revenue_trend", compute)
+
+    def margin_attribution(self):
+        """Margin dollars per product.
+
+        Each estimate's margin (retail price over product value) is shared out
+        across its lines in proportion to line value, so a product's slice
+        reflects how much margin its volume actually carried.
+        """
+        return self._cached("margin_attribution", lambda df: (
+            (df["line_value"] * df["margin"] / 100).groupby(df["product"], observed=True).sum()
+            .rename_axis("Product").reset_index(name="Margin Contribution")))
+
+
+def _concat_lines(frame, new_lines):
+    # Concatenating categoricals with different categories would fall back to
+    # object columns; union the categories so the table stays compact
+    combined = {}
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            combined[column] = union_categoricals([frame[column], new_lines[column]], ignore_order=True)
+        else:
+            combined[column] = np.concatenate([frame[column].to_numpy(), new_lines[column].to_numpy()])
+    return pd.DataFrame(combined)
@@ -0,0 +1,150 @@
+"""Local HTTP JSON endpoint for quoting containers.
+
+``POST /quote`` takes one container or ``{"containers": [...]}``::
+
+    {"container_id": "CONT-1", "destination": "Japan",
+     "products": {"Basmati Rice": {"quantity": 20, "unit_price": 950}},
+     "transport": 2400, "packing": 150, "duty": 5, "margin": 15}
+
+``products`` may also be a list of ``{"product", "quantity", "unit_price"}``.
+Missing costs and margins take the Create Estimate defaults.  The whole
+request is priced with one vectorized ``price_arrays`` call, so large batches
+are cheap.  ``GET /metrics`` serves request timings in the Prometheus text
+format.  Only the standard library and NumPy are imported.
+"""
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from .metrics import CONTENT_TYPE, REGISTRY
+from .pricing import COST_FIELDS, DEFAULTS, MARGIN_FIELDS, RESULT_FIELDS, price_arrays
+
+logger = logging.getLogger(__name__)
+PARAMETERS = COST_FIELDS + ("duty",) + MARGIN_FIELDS
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+def quote(containers):
+    """Price a list of container dicts and return one quote dict per container.
+
+    Raises ``ValueError`` for a malformed request, including missing or
+    non-finite numbers.
+    """
+    if not isinstance(containers, list) or not all(isinstance(c, dict) for c in containers):
+        raise ValueError("containers must be a list of objects")
+    codes, quantities, prices = [], [], []
+    for position, container in enumerate(containers):
+        products = container.get("products") or {}
+        lines = list(products.values()) if isinstance(products, dict) else products
+        if not isinstance(lines, list) or not all(isinstance(line, dict) for line in lines):
+            raise ValueError(f"container {position + 1}: products must be an object or a list of objects")
+        for line in lines:
+            codes.append(position)
+            quantities.append(_finite(line.get("quantity"), "quantity", position))
+            prices.append(_finite(line.get("unit_price"), "unit_price", position))
+    parameters = [[_number(c, field, i) for i, c in enumerate(containers)] for field in PARAMETERS]
+    with np.errstate(over="ignore", invalid="ignore"):
+        priced = price_arrays(np.array(codes, dtype=np.intp), quantities, prices, *parameters)
+    if not all(np.isfinite(priced[field]).all() for field in RESULT_FIELDS):
+        raise ValueError("prices are out of range")
+    columns = {field: priced[field].tolist() for field in RESULT_FIELDS + ("total_product_value", "export_cost")}
+    return [
+        {
+            "container_id": container.get("container_id", str(i + 1)),
+            "total_product_value": columns["total_product_value"][i],
+            "export_cost": columns["export_cost"][i],
+            "results": {field: columns[field][i] for field in RESULT_FIELDS},
+        }
+        for i, container in enumerate(containers)
+    ]
+
+
+class QuoteHandler(BaseHTTPRequestHandler):
+    server_version = "AgroQuote/1.0"
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, keep-alive
+    # clients stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_bytes(200, REGISTRY.prometheus_text().encode(), CONTENT_TYPE)
+        else:
+            self._send(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/quote":
+            self._send(404, {"error": f"Unknown path {self.path}"})
+            return
+        with REGISTRY.time("agro_api_request_seconds", path="/quote"):
+            self._quote()
+
+    def _quote(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY_BYTES:
+            # The body is left unread, so this connection cannot carry another request
+            self.close_connection = True
+            if length < 0:
+                self._send(400, {"error": "Invalid quote request: Content-Length must be a non-negative integer"})
+            else:
+                self._send(413, {"error": "Request body too large"})
+            return
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+            single = isinstance(payload, dict) and "containers" not in payload
+            containers = [payload] if single else payload["containers"]
+            quotes = quote(containers)
+            REGISTRY.inc("agro_api_quotes_total", len(quotes))
+        except (ValueError, KeyError, TypeError) as exc:
+            self._send(400, {"error": f"Invalid quote request: {exc}"})
+            return
+        self._send(200, quotes[0] if single else {"quotes": quotes})
+
+    def _send(self, status, body):
+        self._send_bytes(status, json.dumps(body, allow_nan=False).encode(), "application/json")
+
+    def _send_bytes(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def make_server(host="127.0.0.1", port=8600):
+    return ThreadingHTTPServer((host, port), QuoteHandler)
+
+
+def serve(host="127.0.0.1", port=8600):
+    """Serve quotes until interrupted."""
+    with make_server(host, port) as server:
+        logger.info("Serving quotes on http://%s:%s", host, server.server_address[1])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def _number(container, field, position):
+    value = container.get(field)
+    return DEFAULTS[field] if value is None else _finite(value, field, position)
+
+
+def _finite(value, field, position):
+    # bool is an int subclass, but true/false is never a meaningful amount
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"container {position + 1}: {field} must be a number")
+    number = float(value)
+    if not np.isfinite(number):
+        raise ValueError(f"container {position + 1}: {field} must be finite")
+    return number
@@ -0,0 +1,165 @@
+"""Batch pricing over pandas tables: uploaded files, container/line DataFrames and estimate records."""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from .pricing import COST_FIELDS, DEFAULTS, MARGIN_FIELDS, RESULT_FIELDS, price_arrays
+
+CONTAINER_COLUMNS = ("container_id", "destination", "date") + COST_FIELDS + ("duty",) + MARGIN_FIELDS
+LINE_COLUMNS = ("container_id", "product", "quantity", "unit_price")
+
+
+def price_batch(containers, lines):
+    """Price a table of containers and their product lines.
+
+    ``containers`` needs a unique ``container_id`` column and may carry any of
+    the cost, duty and margin columns (missing ones take ``DEFAULTS``).
+    ``lines`` needs ``container_id``, ``quantity`` and ``unit_price``.
+    Returns ``containers`` with ``total_product_value``, ``export_cost`` and
+    every ``results`` field added.
+    """
+    containers = _with_defaults(containers, normalize_dates=False)
+    ids = pd.Index(containers["container_id"])
+    if not ids.is_unique:
+        raise ValueError("container_id must be unique in the container table")
+    codes = ids.get_indexer(lines["container_id"])
+    if (codes < 0).any():
+        missing = pd.unique(lines["container_id"][codes < 0])[:5]
+        raise ValueError(f"Product lines reference unknown containers: {', '.join(map(str, missing))}")
+    _check_unique_products(lines)
+    priced = price_arrays(
+        codes, lines["quantity"].to_numpy(), lines["unit_price"].to_numpy(),
+        *(containers[field].to_numpy() for field in COST_FIELDS + ("duty",) + MARGIN_FIELDS),
+    )
+    out = containers.copy()
+    out["total_product_value"] = priced["total_product_value"]
+    out["export_cost"] = priced["export_cost"]
+    for field in RESULT_FIELDS:
+        out[f"result_{field}"] = priced[field]
+    return out
+
+
+def fill_transport(containers, lines, rate_table, mask=None):
+    """Set transport to total quantity x freight rate for the destination and date.
+
+    Only containers selected by ``mask`` (default all) with a rate in force on
+    their date are changed; the rest keep their transport cost.
+    """
+    containers = containers.copy()
+    codes = pd.Index(containers["container_id"]).get_indexer(lines["container_id"])
+    quantity = np.bincount(codes[codes >= 0], weights=lines["quantity"].to_numpy(dtype=np.float64)[codes >= 0],
+                           minlength=len(containers))
+    rates = rate_table.rates_for(containers["destination"].to_numpy(), containers["date"].to_numpy())
+    update = ~np.isnan(rates) if mask is None else (np.asarray(mask) & ~np.isnan(rates))
+    containers["transport"] = np.where(update, quantity * rates, containers["transport"].to_numpy(dtype=np.float64))
+    return containers
+
+
+def read_batch_file(file, filename=None, rate_table=None):
+    """Read an uploaded CSV/Excel batch into ``(containers, lines)`` tables.
+
+    The file has one row per product line; container-level columns
+    (destination, date, costs, duty, margins) are taken from the first row of
+    each container.  With a ``rate_table``, containers without a transport
+    cost get one from the freight rate of their route.
+    """
+    name = (filename or getattr(file, "name", "") or "").lower()
+    if name.endswith((".xlsx", ".xls")):
+        df = pd.read_excel(file)
+    else:
+        df = pd.read_csv(file)
+    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+    return split_batch(df, rate_table)
+
+
+def split_batch(df, rate_table=None):
+    """Split a flat one-row-per-line table into ``(containers, lines)``."""
+    missing = [c for c in LINE_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Batch file is missing required columns: {', '.join(missing)}")
+    df = df.dropna(subset=["container_id", "product"])
+    df = df.assign(container_id=df["container_id"].astype(str),
+                   product=df["product"].astype(str).str.strip())
+    lines = pd.DataFrame({
+        "container_id": df["container_id"].to_numpy(),
+        "product": df["product"].to_numpy(),
+        "quantity": pd.to_numeric(df["quantity"], errors="coerce").fillna(0.0).to_numpy(),
+        "unit_price": pd.to_numeric(df["unit_price"], errors="coerce").fillna(0.0).to_numpy(),
+    })
+    _check_unique_products(lines)
+    first = ~df["container_id"].duplicated()
+    container_cols = [c for c in CONTAINER_COLUMNS if c in df.columns]
+    containers = df.loc[first, container_cols].reset_index(drop=True)
+    auto_transport = (containers["transport"].isna().to_numpy() if "transport" in containers
+                      else np.ones(len(containers), dtype=bool))
+    containers = _with_defaults(containers)
+    if rate_table is not None and auto_transport.any():
+        containers = fill_transport(containers, lines, rate_table, auto_transport)
+    return containers, lines
+
+
+def estimate_records(priced, lines, status="active"):
+    """Turn a ``price_batch`` result into estimate dicts for ``st.session_state.estimates``."""
+    codes = pd.Index(priced["container_id"]).get_indexer(lines["container_id"])
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(priced) + 1))
+    quantity = lines["quantity"].to_numpy(dtype=np.float64)[order]
+    unit_price = lines["unit_price"].to_numpy(dtype=np.float64)[order]
+    line_total = (quantity * unit_price).tolist()
+    products = lines["product"].to_numpy()[order].tolist()
+    quantity = quantity.tolist()
+    unit_price = unit_price.tolist()
+    bounds = bounds.tolist()
+    columns = {c: priced[c].tolist() for c in priced.columns}
+    records = []
+    for i in range(len(priced)):
+        start, stop = bounds[i], bounds[i + 1]
+        records.append({
+            "container_id": columns["container_id"][i],
+            "destination": columns["destination"][i],
+            "date": columns["date"][i],
+            "products": {
+                products[j]: {"quantity": quantity[j], "unit_price": unit_price[j],
+                              "total_value": line_total[j]}
+                for j in range(start, stop)
+            },
+            "costs": {
+                "transport": columns["transport"][i],
+                "packing": columns["packing"][i],
+                "fumigation": columns["fumigation"][i],
+                "customs": columns["customs"][i],
+                "duty": columns["duty"][i],
+            },
+            "results": {field: columns[f"result_{field}"][i] for field in RESULT_FIELDS},
+            "status": status,
+        })
+    return records
+
+
+def _check_unique_products(lines):
+    # Estimates keep one entry per product, so a repeated product would be priced but not stored
+    repeated = lines.duplicated(["container_id", "product"])
+    if repeated.any():
+        first = lines.loc[repeated].iloc[0]
+        raise ValueError(f"Product '{first['product']}' appears more than once in container "
+                         f"{first['container_id']}; combine its lines into one")
+
+
+def _with_defaults(containers, normalize_dates=True):
+    containers = containers.copy()
+    containers["container_id"] = containers["container_id"].astype(str)
+    if "destination" not in containers:
+        containers["destination"] = ""
+    containers["destination"] = containers["destination"].fillna("").astype(str)
+    today = datetime.date.today()
+    if "date" not in containers:
+        containers["date"] = today
+    elif normalize_dates:
+        dates = pd.to_datetime(containers["date"], errors="coerce")
+        containers["date"] = dates.fillna(pd.Timestamp(today)).dt.date
+    for field, default in DEFAULTS.items():
+        if field not in containers:
+            containers[field] = default
+        containers[field] = pd.to_numeric(containers[field], errors="coerce").fillna(default).astype(np.float64)
+    return containers
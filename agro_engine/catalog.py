@@ -0,0 +1,149 @@
+"""Product catalog shared by every session.
+
+Products (name, category, unit) live in a ``products`` table next to the
+estimates.  Readers work from a ``CatalogIndex`` snapshot that is built
+once and reused until an edit bumps the catalog's version, so a rerun that
+only searches the catalog never touches SQLite.  The index answers
+category listings and name-prefix searches (matching the start of any word
+in the name) with a binary search over sorted keys, which stays fast with
+thousands of SKUs.
+"""
+import bisect
+import sqlite3
+import threading
+
+from .store import DEFAULT_DB_PATH
+
+DEFAULT_PRODUCTS = {
+    "Basmati Rice": {"Category": "Rice", "Unit": "MT"},
+    "Finger Millet": {"Category": "Millets", "Unit": "MT"},
+    "Red Lentils": {"Category": "Pulses", "Unit": "MT"},
+    "Sunflower Oil": {"Category": "Oils", "Unit": "MT"},
+    "Black Gram": {"Category": "Pulses", "Unit": "MT"},
+}
+CSV_COLUMNS = {"product": ("product", "name"), "category": ("category",), "unit": ("unit",)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    name TEXT PRIMARY KEY,
+    category TEXT NOT NULL,
+    unit TEXT NOT NULL
+);
+"""
+
+
+class CatalogIndex:
+    """Immutable snapshot of the catalog with category and name-prefix indexes."""
+
+    def __init__(self, products):
+        self.products = dict(sorted(products.items(), key=lambda item: item[0].casefold()))
+        self.categories = sorted({details["Category"] for details in self.products.values()}, key=str.casefold)
+        # (folded text from each word start, name) pairs, per category and overall
+        self._keys = {None: []}
+        for name, details in self.products.items():
+            folded = name.casefold()
+            starts = [0] + [i + 1 for i, ch in enumerate(folded) if ch == " " and i + 1 < len(folded)]
+            entries = [(folded[start:], name) for start in starts]
+            self._keys[None].extend(entries)
+            self._keys.setdefault(details["Category"], []).extend(entries)
+        for entries in self._keys.values():
+            entries.sort()
+
+    def __len__(self):
+        return len(self.products)
+
+    def __contains__(self, name):
+        return name in self.products
+
+    def get(self, name):
+        return self.products.get(name)
+
+    def search(self, prefix="", category=None, limit=50):
+        """Product names in ``category`` (all if ``None``) with a word starting with ``prefix``, A-Z."""
+        entries = self._keys.get(category, [])
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            names = (name for name, details in self.products.items()
+                     if category is None or details["Category"] == category)
+            return [name for name, _ in zip(names, range(limit))]
+        matches = set()
+        for key, name in entries[bisect.bisect_left(entries, (prefix,)):]:
+            if not key.startswith(prefix):
+                break
+            matches.add(name)
+        return sorted(matches, key=str.casefold)[:limit]
+
+
+class ProductCatalog:
+    """SQLite-backed product catalog with a cached, version-checked index."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+            if not self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]:
+                self._write(DEFAULT_PRODUCTS.items())
+        # Bumped on every edit; the cached index is rebuilt when it falls behind
+        self.version = 0
+        self._index = None
+        self._index_version = None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def index(self):
+        """The current ``CatalogIndex``, rebuilt only after an edit."""
+        with self._lock:
+            if self._index_version != self.version:
+                rows = self._conn.execute("SELECT name, category, unit FROM products").fetchall()
+                self._index = CatalogIndex({name: {"Category": category, "Unit": unit}
+                                            for name, category, unit in rows})
+                self._index_version = self.version
+            return self._index
+
+    def upsert(self, name, category, unit):
+        """Add a product or update an existing one."""
+        self.upsert_many({name: {"Category": category, "Unit": unit}})
+
+    def upsert_many(self, products):
+        """Add or update ``{name: {"Category", "Unit"}}`` in one transaction; returns the count."""
+        products = {name.strip(): details for name, details in products.items()}
+        if any(not name for name in products):
+            raise ValueError("Product names cannot be blank")
+        with self._lock, self._conn:
+            self._write(products.items())
+            self.version += 1
+        return len(products)
+
+    def delete(self, name):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM products WHERE name = ?", (name,))
+            self.version += 1
+
+    def import_csv(self, file):
+        """Upsert every row of a CSV with ``product`` (or ``name``), ``category`` and ``unit`` columns."""
+        import pandas as pd
+
+        df = pd.read_csv(file, dtype=str, keep_default_na=False)
+        columns = {column.strip().lower(): column for column in df.columns}
+        selected = {}
+        for field, aliases in CSV_COLUMNS.items():
+            column = next((columns[alias] for alias in aliases if alias in columns), None)
+            if column is None:
+                raise ValueError(f"Missing column '{field}' in the product file")
+            selected[field] = df[column].str.strip()
+        if (selected["product"] == "").any():
+            raise ValueError("Product file has rows without a product name")
+        # Later rows win when a product appears more than once
+        return self.upsert_many({name: {"Category": category or "Uncategorized", "Unit": unit or "MT"}
+                                 for name, category, unit in zip(selected["product"], selected["category"],
+                                                                 selected["unit"])})
+
+    def _write(self, products):
+        self._conn.executemany(
+            "INSERT INTO products (name, category, unit) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET category = excluded.category, unit = excluded.unit",
+            ((name, details["Category"], details["Unit"]) for name, details in products))
@@ -0,0 +1,117 @@
+"""Command line interface: ``python -m agro_engine {price,export,import,serve} ...``.
+
+Heavy modules are imported inside each command, so ``--help`` and the
+``serve`` command never load pandas, and nothing here loads Plotly or
+ReportLab.
+"""
+import argparse
+import logging
+import sys
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="agro_engine", description="Agro grain export pricing tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    price = commands.add_parser("price", help="Price a CSV/Excel file of containers (one row per product line).")
+    price.add_argument("input", help="Batch file with container_id, product, quantity, unit_price columns.")
+    price.add_argument("-o", "--output", help="Write priced containers to this CSV (default: stdout).")
+    rates = price.add_mutually_exclusive_group()
+    rates.add_argument("--freight-rates", metavar="CSV", help="Fill missing transport costs from this rate file.")
+    rates.add_argument("--mock-freight", action="store_true", help="Fill missing transport costs from mock rates.")
+    price.add_argument("--save", action="store_true", help="Also store the estimates in the estimate database.")
+    price.add_argument("--db", help="Estimate database path (default: $AGRO_DB_PATH or agro_estimates.db).")
+    price.set_defaults(handler=_price)
+
+    export = commands.add_parser("export", help="Export stored estimate history (one row per product line).")
+    export.add_argument("output", help="Output file; the format follows the extension (.csv, .parquet, .arrow).")
+    export.add_argument("--format", choices=("csv", "parquet", "arrow"), help="Override the output format.")
+    export.add_argument("--destination", action="append", help="Only this destination (repeatable).")
+    export.add_argument("--status", action="append", help="Only this status (repeatable).")
+    export.add_argument("--from", dest="date_from", metavar="YYYY-MM-DD", help="Only estimates dated on or after.")
+    export.add_argument("--to", dest="date_to", metavar="YYYY-MM-DD", help="Only estimates dated on or before.")
+    export.add_argument("--db", help="Estimate database path (default: $AGRO_DB_PATH or agro_estimates.db).")
+    export.set_defaults(handler=_export)
+
+    import_ = commands.add_parser("import", help="Import estimate history from a CSV, Parquet or Arrow file.")
+    import_.add_argument("input", help="History file in the export layout (at least container_id, date, product, "
+                                       "quantity, unit_price).")
+    import_.add_argument("--format", choices=("csv", "parquet", "arrow"), help="Override the input format.")
+    import_.add_argument("--skip-invalid", action="store_true",
+                         help="Skip estimates with invalid rows instead of stopping at the first one.")
+    import_.add_argument("--db", help="Estimate database path (default: $AGRO_DB_PATH or agro_estimates.db).")
+    import_.set_defaults(handler=_import)
+
+    serve = commands.add_parser("serve", help="Serve the JSON quote API.")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8600)
+    serve.set_defaults(handler=_serve)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    try:
+        return args.handler(args) or 0
+    except (ImportError, OSError, ValueError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+
+
+def _price(args):
+    from .batch import estimate_records, price_batch, read_batch_file
+
+    rate_table = None
+    if args.freight_rates or args.mock_freight:
+        from .freight import CsvRateProvider, MockRateProvider, RateTable
+        provider = CsvRateProvider(args.freight_rates) if args.freight_rates else MockRateProvider()
+        rate_table = RateTable(provider.fetch())
+    containers, lines = read_batch_file(args.input, rate_table=rate_table)
+    priced = price_batch(containers, lines)
+    priced.to_csv(args.output or sys.stdout, index=False)
+    if args.save:
+        from .store import DEFAULT_DB_PATH, EstimateStore
+        store = EstimateStore(args.db or DEFAULT_DB_PATH)
+        store.add_many(estimate_records(priced, lines))
+        store.close()
+    if args.output or args.save:
+        logging.info("Priced %d containers (%d product lines).", len(priced), len(lines))
+
+
+def _export(args):
+    from .history_io import export_history, format_for
+    from .store import DEFAULT_DB_PATH, EstimateStore
+
+    filters = {"destination": args.destination, "status": args.status}
+    for key in ("date_from", "date_to"):
+        if getattr(args, key):
+            filters[key] = _parse_date(getattr(args, key))
+    store = EstimateStore(args.db or DEFAULT_DB_PATH)
+    try:
+        rows = export_history(store, args.output, format_for(args.output, args.format), **filters)
+    finally:
+        store.close()
+    logging.info("Exported %d product lines to %s.", rows, args.output)
+
+
+def _import(args):
+    from .history_io import import_history
+    from .store import DEFAULT_DB_PATH, EstimateStore
+
+    store = EstimateStore(args.db or DEFAULT_DB_PATH)
+    try:
+        summary = import_history(store, args.input, args.format, skip_invalid=args.skip_invalid)
+    finally:
+        store.close()
+    for error in summary["errors"]:
+        logging.warning(error)
+    logging.info("Imported %d estimates (%d product lines); skipped %d invalid estimates.",
+                 summary["estimates"], summary["lines"], summary["skipped_estimates"])
+
+
+def _parse_date(text):
+    import datetime
+    return datetime.date.fromisoformat(text)
+
+
+def _serve(args):
+    from .api import serve
+    serve(args.host, args.port)
@@ -0,0 +1,186 @@
+"""Per-series price forecasting.
+
+History is resampled into regular buckets (weekly by default) for every
+product x destination series.  The value of a bucket is the
+quantity-weighted retail price per unit of the lines in it, i.e. the unit
+price grossed up by the estimate's margin.  Each series gets Holt's linear
+exponential smoothing; all series are stepped together as NumPy vectors, so
+hundreds of series cost one pass over the time axis.
+
+``ForecastEngine`` keeps the bucket sums and the smoothing state of every
+bucket.  New lines only re-run the smoothing from the earliest bucket they
+touch; updates and deletes in the store trigger a full refit.
+"""
+import statistics
+import threading
+
+import numpy as np
+import pandas as pd
+
+FREQUENCIES = {"Weekly": "W", "Monthly": "M", "Quarterly": "Q"}
+
+
+class ForecastEngine:
+    """Incrementally refitted Holt models for every product x destination series."""
+
+    def __init__(self, line_table, freq="W", alpha=0.4, beta=0.1):
+        self.line_table = line_table
+        self.freq = freq
+        self.alpha = alpha
+        self.beta = beta
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._mutations = None
+        self._last_line_id = 0
+        self.series = pd.MultiIndex.from_arrays([[], []], names=["product", "destination"])
+        self._start = None              # ordinal of the first bucket
+        self._sums = np.zeros((0, 0))   # sum of quantity * unit retail price per series x bucket
+        self._weights = np.zeros((0, 0))
+        self._level = np.zeros((0, 0))
+        self._trend = np.zeros((0, 0))
+        self._sse = np.zeros((0, 0))    # cumulative squared one-step errors
+        self._n = np.zeros((0, 0))      # cumulative count of one-step errors
+
+    # ---- fitting --------------------------------------------------------
+
+    def refresh(self):
+        """Bring the models up to date with the line table; returns ``self``."""
+        with self._lock:
+            frame, (mutations, _) = self.line_table.snapshot()
+            if mutations != self._mutations:
+                self._reset()
+                self._mutations = mutations
+            # The line table is ordered by line id, so new lines are a tail slice
+            new_lines = frame.iloc[int(np.searchsorted(frame["line_id"].to_numpy(), self._last_line_id, "right")):]
+            new_lines = new_lines[new_lines["date"].notna()]
+            if not new_lines.empty:
+                self._ingest(new_lines, frame)
+                self._last_line_id = int(frame["line_id"].iloc[-1])
+        return self
+
+    def _ingest(self, lines, frame):
+        buckets = pd.PeriodIndex(lines["date"], freq=self.freq).asi8
+        if self._start is not None and buckets.min() < self._start:
+            # Back-dated data before the first bucket: rebuild the grid from scratch
+            mutations = self._mutations
+            self._reset()
+            self._mutations = mutations
+            return self._ingest(frame[frame["date"].notna()], frame)
+        start = buckets.min() if self._start is None else self._start
+        width = int(max(buckets.max() - start + 1, self._sums.shape[1]))
+        keys = pd.MultiIndex.from_arrays([lines["product"].to_numpy(), lines["destination"].to_numpy()],
+                                         names=["product", "destination"])
+        series = self.series.append(keys.difference(self.series)) if len(self.series) else keys.unique()
+        old_width = self._sums.shape[1]
+        self._grow(len(series), width)
+        self.series = series
+        self._start = start
+
+        rows = series.get_indexer(keys)
+        cols = buckets - start
+        quantity = lines["quantity"].to_numpy(dtype=np.float64)
+        unit_retail = lines["unit_price"].to_numpy(dtype=np.float64) * (1 + lines["margin"].to_numpy(dtype=np.float64) / 100)
+        # Lines without a quantity still count, with unit weight
+        weight = np.where(quantity > 0, quantity, 1.0)
+        np.add.at(self._sums, (rows, cols), weight * unit_retail)
+        np.add.at(self._weights, (rows, cols), weight)
+        # New buckets past the old grid hold no fitted state yet, so smooth from there at the latest
+        self._smooth(int(min(cols.min(), old_width)))
+
+    def _grow(self, n_series, width):
+        def grow(a, fill=0.0):
+            out = np.full((n_series, width), fill)
+            out[:a.shape[0], :a.shape[1]] = a
+            return out
+        self._sums, self._weights = grow(self._sums), grow(self._weights)
+        # A NaN level marks a series that has not started, as at the start of _smooth
+        self._level, self._trend = grow(self._level, np.nan), grow(self._trend)
+        self._sse, self._n = grow(self._sse), grow(self._n)
+
+    def _smooth(self, first):
+        """Re-run Holt's recursions for every series from bucket ``first`` onwards."""
+        alpha, beta = self.alpha, self.beta
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = self._sums / self._weights     # NaN where a bucket has no data
+        n_series = values.shape[0]
+        if first == 0:
+            level, trend = np.full(n_series, np.nan), np.zeros(n_series)
+            sse, n = np.zeros(n_series), np.zeros(n_series)
+        else:
+            level, trend = self._level[:, first - 1].copy(), self._trend[:, first - 1].copy()
+            sse, n = self._sse[:, first - 1].copy(), self._n[:, first - 1].copy()
+        for t in range(first, values.shape[1]):
+            y = values[:, t]
+            observed = ~np.isnan(y)
+            started = ~np.isnan(level)
+            predicted = level + trend
+            update = observed & started
+            error = np.where(update, y - predicted, 0.0)
+            new_level = np.where(update, alpha * y + (1 - alpha) * predicted, predicted)
+            new_level = np.where(observed & ~started, y, new_level)
+            trend = np.where(update, beta * (new_level - level) + (1 - beta) * trend, trend)
+            level = new_level
+            sse = sse + error * error
+            n = n + update
+            self._level[:, t], self._trend[:, t] = level, trend
+            self._sse[:, t], self._n[:, t] = sse, n
+
+    # ---- forecasts ------------------------------------------------------
+
+    def history(self, product, destination):
+        """Observed bucket values and fitted levels for one series."""
+        # The engine is shared across sessions; another one's refresh() may be resizing the arrays
+        with self._lock:
+            row = self._row(product, destination)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                values = self._sums[row] / self._weights[row]
+            return pd.DataFrame({"period": self._periods(np.arange(values.shape[0])),
+                                 "value": values, "level": self._level[row].copy()})
+
+    def forecast(self, horizon=4, interval=0.95, series=None):
+        """Forecast every series (or the given ``(product, destination)`` keys) ``horizon`` buckets ahead.
+
+        Intervals use the series' one-step error variance, widened with the
+        horizon as for Holt's method.
+        """
+        with self._lock:
+            if self._start is None:
+                return pd.DataFrame(columns=["product", "destination", "step", "period", "forecast", "lower", "upper"])
+            rows = (np.arange(len(self.series)) if series is None
+                    else self.series.get_indexer(pd.MultiIndex.from_tuples(series)))
+            rows = rows[rows >= 0]
+            last = self._sums.shape[1] - 1
+            level, trend = self._level[rows, last], self._trend[rows, last]
+            n = self._n[rows, last]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sigma2 = np.where(n >= 2, self._sse[rows, last] / n, np.nan)
+            steps = np.arange(1, horizon + 1)
+            point = level[:, None] + steps[None, :] * trend[:, None]
+            # Var(h) = sigma^2 * (1 + sum_{j<h} alpha^2 (1 + j beta)^2)
+            j = np.arange(horizon)
+            growth = np.cumsum(np.where(j == 0, 0.0, self.alpha ** 2 * (1 + j * self.beta) ** 2))
+            half_width = (statistics.NormalDist().inv_cdf(0.5 + interval / 2)
+                          * np.sqrt(sigma2[:, None] * (1 + growth[None, :])))
+            keys = self.series[rows]
+            return pd.DataFrame({
+                "product": np.repeat(keys.get_level_values(0), horizon),
+                "destination": np.repeat(keys.get_level_values(1), horizon),
+                "step": np.tile(steps, len(rows)),
+                "period": np.tile(self._periods(last + steps), len(rows)),
+                "forecast": point.ravel(),
+                "lower": (point - half_width).ravel(),
+                "upper": (point + half_width).ravel(),
+            })
+
+    def _row(self, product, destination):
+        row = self.series.get_indexer(pd.MultiIndex.from_tuples([(product, destination)]))[0]
+        if row < 0:
+            raise KeyError((product, destination))
+        return row
+
+    def _periods(self, offsets):
+        offsets = np.asarray(offsets)
+        first = pd.Period(ordinal=int(self._start), freq=self.freq)
+        return pd.period_range(first, periods=int(offsets.max()) + 1)[offsets].to_timestamp()
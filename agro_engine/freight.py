@@ -0,0 +1,182 @@
+"""Freight rates by route and effective date.
+
+Rates come from a provider (a CSV file, or ``MockRateProvider`` standing in
+for a live feed) and are held in a ``RateTable`` indexed by
+origin/destination with each route's effective dates sorted, so the rate in
+force on any date is a binary search.  ``FreightRates`` caches the table
+with a TTL and refreshes it on a background thread, handing out the
+previous table until the new one is ready.  History is merged across
+refreshes so past estimates can be re-priced at the rates of their date.
+"""
+import datetime
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ORIGIN = "India"
+RATE_COLUMNS = ("origin", "destination", "effective_date", "rate")
+
+
+class CsvRateProvider:
+    """Reads ``origin,destination,effective_date,rate`` rows (rate in $ per unit) from a CSV file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.name = f"File: {os.path.basename(path)}"
+
+    def fetch(self):
+        df = pd.read_csv(self.path)
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        missing = [c for c in RATE_COLUMNS if c not in df.columns]
+        if missing:
+            raise ValueError(f"Freight rate file is missing columns: {', '.join(missing)}")
+        return df[list(RATE_COLUMNS)]
+
+
+class MockRateProvider:
+    """Deterministic monthly rates for a year back, standing in for a live rate feed."""
+
+    name = "Mock rates"
+    BASE_RATES = {
+        "United States": 120.0,
+        "United Kingdom": 150.0,
+        "United Arab Emirates": 100.0,
+        "Saudi Arabia": 90.0,
+        "China": 130.0,
+        "Japan": 140.0,
+        "India": 40.0,
+    }
+
+    def __init__(self, months=12):
+        self.months = months
+
+    def fetch(self):
+        today = datetime.date.today()
+        rows = []
+        for month in range(self.months, -1, -1):
+            year, index = divmod(today.year * 12 + today.month - 1 - month, 12)
+            effective = datetime.date(year, index + 1, 1)
+            for position, (destination, base) in enumerate(self.BASE_RATES.items()):
+                # Small seasonal swing, phase-shifted per route
+                swing = 1 + 0.08 * np.sin((index + position) * np.pi / 6)
+                rows.append((DEFAULT_ORIGIN, destination, effective, round(base * swing, 2)))
+        return pd.DataFrame(rows, columns=list(RATE_COLUMNS))
+
+
+class RateTable:
+    """Immutable rate history indexed by route, then by effective date."""
+
+    def __init__(self, rates):
+        rates = pd.DataFrame(rates, columns=list(RATE_COLUMNS)).copy()
+        rates["effective_date"] = pd.to_datetime(rates["effective_date"]).dt.normalize()
+        rates["rate"] = pd.to_numeric(rates["rate"], errors="coerce")
+        rates = (rates.dropna()
+                 .drop_duplicates(["origin", "destination", "effective_date"], keep="last")
+                 .sort_values(["origin", "destination", "effective_date"], ignore_index=True))
+        self.rates = rates
+        self._index = {
+            route: (group["effective_date"].to_numpy(dtype="datetime64[D]"), group["rate"].to_numpy(dtype=np.float64))
+            for route, group in rates.groupby(["origin", "destination"], sort=False)
+        }
+
+    def merged(self, rates):
+        """A new table with ``rates`` layered over this one's history."""
+        return RateTable(pd.concat([self.rates, pd.DataFrame(rates, columns=list(RATE_COLUMNS))], ignore_index=True))
+
+    def routes(self):
+        return list(self._index)
+
+    def rate(self, destination, date=None, origin=DEFAULT_ORIGIN):
+        """Rate in force on ``date`` (default today), or ``None`` for an unknown route or an earlier date."""
+        return _scalar(self.rates_for([destination], [date or datetime.date.today()], origin)[0])
+
+    def rates_for(self, destinations, dates, origin=DEFAULT_ORIGIN):
+        """Vectorized lookup: rate per (destination, date) pair.
+
+        NaN for unknown routes and for dates before a route's first known
+        rate, which is not in effect yet.
+        """
+        destinations = np.asarray(destinations, dtype=object)
+        dates = pd.to_datetime(pd.Series(dates)).to_numpy(dtype="datetime64[D]")
+        out = np.full(destinations.shape[0], np.nan)
+        for destination in pd.unique(destinations):
+            route = self._index.get((origin, destination))
+            if route is None:
+                continue
+            effective, rates = route
+            mask = destinations == destination
+            position = np.searchsorted(effective, dates[mask], side="right") - 1
+            out[mask] = np.where(position >= 0, rates[np.clip(position, 0, None)], np.nan)
+        return out
+
+    def current(self, on=None):
+        """Latest rate per route as of ``on`` (default today)."""
+        on = pd.Timestamp(on or datetime.date.today())
+        in_force = self.rates[self.rates["effective_date"] <= on]
+        return in_force.groupby(["origin", "destination"], as_index=False).last()
+
+    def history(self, destination, origin=DEFAULT_ORIGIN):
+        rates = self.rates
+        return rates[(rates["origin"] == origin) & (rates["destination"] == destination)].reset_index(drop=True)
+
+
+class FreightRates:
+    """TTL-cached ``RateTable`` refreshed in the background from a provider."""
+
+    def __init__(self, provider, ttl=15 * 60):
+        self.provider = provider
+        self.ttl = ttl
+        self.loaded_at = None
+        self.last_error = None
+        self._table = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def table(self):
+        """The current table; the first call loads synchronously, later ones never block."""
+        with self._lock:
+            if self._table is None:
+                self._load()
+            elif time.time() - self.loaded_at > self.ttl and not self._refreshing:
+                self._refreshing = True
+                threading.Thread(target=self._refresh_in_background, daemon=True).start()
+            return self._table
+
+    def refresh(self):
+        """Reload from the provider now, blocking until done."""
+        with self._lock:
+            self._load()
+        return self._table
+
+    def _refresh_in_background(self):
+        try:
+            rates = self.provider.fetch()
+            with self._lock:
+                self._table = self._table.merged(rates)
+                self.loaded_at = time.time()
+                self.last_error = None
+        except Exception as exc:  # keep serving the previous table
+            with self._lock:
+                self.last_error = exc
+                self.loaded_at = time.time()
+        finally:
+            self._refreshing = False
+
+    def _load(self):
+        rates = self.provider.fetch()
+        self._table = RateTable(rates) if self._table is None else self._table.merged(rates)
+        self.loaded_at = time.time()
+        self.last_error = None
+
+
+def default_provider():
+    """``CsvRateProvider`` for ``$AGRO_FREIGHT_RATES`` if set, otherwise the mock feed."""
+    path = os.environ.get("AGRO_FREIGHT_RATES")
+    return CsvRateProvider(path) if path else MockRateProvider()
+
+
+def _scalar(value):
+    return None if np.isnan(value) else float(value)
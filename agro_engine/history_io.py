@@ -0,0 +1,268 @@
+"""Streaming import and export of estimate history.
+
+History is exchanged as a flat table with one row per product line and the
+estimate's columns repeated on each of its lines (``EXPORT_COLUMNS``).
+Export pages through ``EstimateStore.line_chunks`` and writes CSV, Parquet
+or Arrow IPC one chunk at a time; import reads the same layout in chunks,
+validates each chunk and stores it with ``EstimateStore.add_frame``.  Memory
+depends on the chunk size, never on the size of the history.
+
+Parquet and Arrow need the optional ``pyarrow`` package; CSV needs only
+pandas.
+"""
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from .pricing import DEFAULTS, MARGIN_FIELDS, price_arrays
+from .store import CHUNK_ROWS, COST_KEYS, LINE_EXPORT_COLUMNS, RESULT_KEYS
+
+EXPORT_COLUMNS = tuple(c for c in LINE_EXPORT_COLUMNS if c != "line_id")
+REQUIRED_COLUMNS = ("container_id", "date", "product", "quantity", "unit_price")
+FORMATS = {".csv": "csv", ".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+MAX_ERRORS = 100
+
+
+def format_for(name, fmt=None):
+    """Resolve ``fmt`` or infer it from a file name's extension."""
+    fmt = fmt or FORMATS.get(os.path.splitext(str(name or ""))[1].lower())
+    if fmt not in ("csv", "parquet", "arrow"):
+        raise ValueError(f"Unknown history format for {name!r}; use CSV, Parquet or Arrow")
+    return fmt
+
+
+# ---- export -------------------------------------------------------------
+
+def export_history(store, target, fmt="csv", chunk_size=CHUNK_ROWS, **filters):
+    """Write matching history to ``target`` (path or binary file) and return the number of rows.
+
+    Takes the same filters as ``EstimateStore.query``.
+    """
+    chunks = store.line_chunks(chunk_size, **filters)
+    if fmt == "csv":
+        return _write_csv(chunks, target)
+    return _write_arrow(chunks, target, fmt)
+
+
+def _write_csv(chunks, target):
+    rows = 0
+    with _text_output(target) as handle:
+        for chunk in chunks:
+            chunk.to_csv(handle, header=rows == 0, index=False)
+            rows += len(chunk)
+        if not rows:
+            pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(handle, index=False)
+    return rows
+
+
+@contextlib.contextmanager
+def _text_output(target):
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, "w", newline="", encoding="utf-8") as handle:
+            yield handle
+    else:
+        handle = io.TextIOWrapper(target, encoding="utf-8", newline="", write_through=True)
+        try:
+            yield handle
+        finally:
+            handle.flush()
+            handle.detach()     # leave the caller's file open
+
+
+def _write_arrow(chunks, target, fmt):
+    pa = _pyarrow()
+    schema = _arrow_schema(pa)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(target, schema)
+    else:
+        writer = pa.ipc.new_file(target, schema)
+    rows = 0
+    with writer:
+        for chunk in chunks:
+            chunk = chunk.assign(date=pd.to_datetime(chunk["date"], errors="coerce"))
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            rows += len(chunk)
+    return rows
+
+
+def _arrow_schema(pa):
+    types = {"estimate_id": pa.int64(), "date": pa.date32()}
+    for column in ("container_id", "destination", "status", "product"):
+        types[column] = pa.string()
+    return pa.schema([(column, types.get(column, pa.float64())) for column in EXPORT_COLUMNS])
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Parquet and Arrow files need the pyarrow package (pip install pyarrow)") from None
+    return pyarrow
+
+
+# ---- import -------------------------------------------------------------
+
+def import_history(store, source, fmt=None, chunk_size=CHUNK_ROWS, skip_invalid=False):
+    """Validate and store history from ``source`` (path or file) chunk by chunk.
+
+    Rows of one estimate must be consecutive; they are grouped by
+    ``estimate_id`` when the file has one, otherwise by ``container_id``.
+    Estimate-level columns are read from an estimate's first row; missing
+    costs and margins take the Create Estimate defaults, and estimates
+    without stored results are priced on the way in.
+
+    An invalid row rejects its whole estimate.  Unless ``skip_invalid`` is
+    set, the first chunk with rejected estimates raises ``ValueError``
+    (earlier chunks stay imported).  Returns a summary dict with
+    ``estimates``, ``lines``, ``skipped_estimates`` and ``errors``.
+    """
+    fmt = format_for(getattr(source, "name", source), fmt)
+    summary = {"estimates": 0, "lines": 0, "skipped_estimates": 0, "errors": []}
+    for rows, first_row in _whole_estimates(read_history_chunks(source, fmt, chunk_size)):
+        estimates, lines, errors, skipped = _prepare(rows, first_row)
+        if errors:
+            if not skip_invalid:
+                raise ValueError(f"{errors[0]} ({summary['estimates']:,} estimates were imported before it)")
+            summary["errors"].extend(errors[:MAX_ERRORS - len(summary["errors"])])
+            summary["skipped_estimates"] += skipped
+        if len(estimates):
+            store.add_frame(estimates, lines)
+            summary["estimates"] += len(estimates)
+            summary["lines"] += len(lines)
+    return summary
+
+
+def read_history_chunks(source, fmt, chunk_size=CHUNK_ROWS):
+    """Yield DataFrames of at most ``chunk_size`` rows with normalized column names."""
+    if fmt == "csv":
+        chunks = pd.read_csv(source, chunksize=chunk_size, float_precision="round_trip",
+                             dtype={"container_id": str, "product": str, "destination": str, "status": str})
+    elif fmt == "parquet":
+        _pyarrow()
+        import pyarrow.parquet as pq
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size))
+    else:
+        chunks = _arrow_batches(_pyarrow(), source, chunk_size)
+    for chunk in chunks:
+        chunk.columns = [str(c).strip().lower().replace(" ", "_") for c in chunk.columns]
+        yield chunk
+
+
+def _arrow_batches(pa, source, chunk_size):
+    try:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    except pa.ArrowInvalid:
+        if hasattr(source, "seek"):
+            source.seek(0)
+        batches = pa.ipc.open_stream(source)
+    for batch in batches:
+        for start in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(start, chunk_size).to_pandas()
+
+
+def _whole_estimates(chunks):
+    # Hold back each chunk's last estimate, whose rows may continue in the next chunk
+    carry, offset = None, 0
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        else:
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"History file is missing required columns: {', '.join(missing)}")
+        if chunk.empty:
+            continue
+        starts = np.flatnonzero(_new_estimate(chunk))
+        last = int(starts[-1])
+        if last:
+            yield chunk.iloc[:last].reset_index(drop=True), offset
+        offset += last
+        carry = chunk.iloc[last:].reset_index(drop=True)
+    if carry is not None and not carry.empty:
+        yield carry, offset
+
+
+def _new_estimate(df):
+    key = df["estimate_id"] if "estimate_id" in df else df["container_id"]
+    return key.ne(key.shift()).to_numpy()
+
+
+def _prepare(df, first_row):
+    """Validate rows and build the ``add_frame`` tables; returns ``(estimates, lines, errors, skipped)``."""
+    starts = _new_estimate(df)
+    group = np.cumsum(starts) - 1
+    container_id = df["container_id"].astype("string").str.strip()
+    product = df["product"].astype("string").str.strip()
+    quantity = pd.to_numeric(df["quantity"], errors="coerce")
+    unit_price = pd.to_numeric(df["unit_price"], errors="coerce")
+    dates = pd.to_datetime(df["date"], errors="coerce")
+    checks = (
+        (container_id.isna() | (container_id == ""), "missing container_id"),
+        (product.isna() | (product == ""), "missing product"),
+        (quantity.isna() | (quantity < 0), "quantity must be a number >= 0"),
+        (unit_price.isna() | (unit_price < 0), "unit_price must be a number >= 0"),
+        (dates.isna(), "date is not a valid date"),
+        (pd.DataFrame({"group": group, "product": product}).duplicated(), "product repeated within an estimate"),
+    )
+    bad = np.zeros(len(df), dtype=bool)
+    problems = []
+    for mask, message in checks:
+        mask = pd.array(mask, dtype="boolean").fillna(True).to_numpy(dtype=bool)
+        bad |= mask
+        problems.extend((row, message) for row in np.flatnonzero(mask)[:MAX_ERRORS].tolist())
+    errors = [f"Row {first_row + row + 1}: {message}" for row, message in sorted(problems)[:MAX_ERRORS]]
+
+    # An invalid row rejects its whole estimate
+    bad_groups = np.unique(group[bad])
+    keep = ~np.isin(group, bad_groups)
+    first = np.flatnonzero(keep & starts)
+    position = np.cumsum(starts[keep]) - 1
+    estimates = pd.DataFrame({
+        "container_id": container_id.to_numpy()[first].astype(object),
+        "destination": _text(df, "destination", "", first),
+        "date": dates.to_numpy()[first].astype("datetime64[D]").astype(str).astype(object),
+        "status": _text(df, "status", "active", first),
+    })
+    for key in COST_KEYS:
+        estimates[key] = _number(df, key, DEFAULTS[key], first)
+    line_total = (quantity * unit_price).to_numpy()
+    if "line_value" in df:
+        given = pd.to_numeric(df["line_value"], errors="coerce").to_numpy()
+        line_total = np.where(np.isnan(given), line_total, given)
+    lines = pd.DataFrame({
+        "estimate": position,
+        "product": product.to_numpy()[keep].astype(object),
+        "quantity": quantity.to_numpy()[keep],
+        "unit_price": unit_price.to_numpy()[keep],
+        "total_value": line_total[keep],
+    })
+
+    # Keep stored results; price the estimates that have any result missing
+    given = np.column_stack([_number(df, key, np.nan, first) for key in RESULT_KEYS])
+    missing = np.isnan(given).any(axis=1)
+    if missing.any():
+        priced = price_arrays(position, lines["quantity"].to_numpy(), lines["unit_price"].to_numpy(),
+                              *(estimates[key].to_numpy() for key in COST_KEYS),
+                              *(_number(df, field, DEFAULTS[field], first) for field in MARGIN_FIELDS))
+        for i, key in enumerate(RESULT_KEYS):
+            given[:, i] = np.where(missing, priced[key], given[:, i])
+    for i, key in enumerate(RESULT_KEYS):
+        estimates[key] = given[:, i]
+    return estimates, lines, errors, len(bad_groups)
+
+
+def _text(df, column, default, rows):
+    if column not in df:
+        return np.full(len(rows), default, dtype=object)
+    return df[column].astype("string").fillna(default).to_numpy()[rows].astype(object)
+
+
+def _number(df, column, default, rows):
+    if column not in df:
+        return np.full(len(rows), default, dtype=np.float64)
+    return pd.to_numeric(df[column], errors="coerce").fillna(default).to_numpy(dtype=np.float64)[rows]
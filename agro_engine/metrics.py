@@ -0,0 +1,232 @@
+"""In-process performance metrics with Prometheus text export.
+
+A ``MetricsRegistry`` holds counters, gauges and histograms keyed by metric
+name and label values.  Recording is a dictionary lookup and a few
+additions under a lock, cheap enough to leave on around every screen render
+and chart build.  ``prometheus_text`` renders the text exposition format;
+it can be written to a file for a textfile collector, served over HTTP by
+``start_http_server``, or read by the quote API at ``GET /metrics``.
+
+Only the standard library is imported.
+"""
+import bisect
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters, gauges and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}         # name -> (kind, help, buckets)
+        self._values = {}       # (name, labels) -> float, or [count, sum, max, bucket counts] for histograms
+        self._collectors = []
+
+    def describe(self, name, kind, help_text, buckets=TIME_BUCKETS):
+        """Declare a ``counter``, ``gauge`` or ``histogram``; undeclared names are rejected."""
+        if kind not in ("counter", "gauge", "histogram"):
+            raise ValueError(f"Unknown metric type {kind!r}")
+        with self._lock:
+            self._meta[name] = (kind, help_text, tuple(buckets) if kind == "histogram" else None)
+
+    def add_collector(self, collect):
+        """Call ``collect(registry)`` before every export, e.g. to set gauges from live objects."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    # ---- recording ------------------------------------------------------
+
+    def inc(self, name, value=1, **labels):
+        key = self._key(name, "counter", labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        key = self._key(name, "gauge", labels)
+        with self._lock:
+            self._values[key] = value
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, "histogram", labels)
+        buckets = self._meta[name][2]
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [0, 0.0, 0.0, [0] * (len(buckets) + 1)]
+            entry[0] += 1
+            entry[1] += value
+            entry[2] = max(entry[2], value)
+            entry[3][bisect.bisect_left(buckets, value)] += 1
+
+    @contextlib.contextmanager
+    def time(self, name, **labels):
+        """Observe the wall time of the ``with`` block in histogram ``name``."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def _key(self, name, kind, labels):
+        meta = self._meta.get(name)
+        if meta is None or meta[0] != kind:
+            raise KeyError(f"{name!r} is not a registered {kind}")
+        return name, tuple(sorted(labels.items()))
+
+    # ---- reading --------------------------------------------------------
+
+    def collect(self):
+        for collect in list(self._collectors):
+            try:
+                collect(self)
+            except Exception:
+                logger.exception("Metrics collector %r failed", collect)
+
+    def samples(self):
+        """Rows of ``{name, kind, labels, value}`` (histograms add count, sum, mean and max)."""
+        self.collect()
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: (item[0][0], item[0][1]))
+            rows = []
+            for (name, labels), value in items:
+                row = {"name": name, "kind": self._meta[name][0], "labels": dict(labels)}
+                if isinstance(value, list):
+                    count, total, peak = value[0], value[1], value[2]
+                    row.update(count=count, sum=total, mean=total / count if count else 0.0, max=peak)
+                else:
+                    row["value"] = value
+                rows.append(row)
+        return rows
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format."""
+        self.collect()
+        lines = []
+        with self._lock:
+            by_name = {}
+            for (name, labels), value in self._values.items():
+                by_name.setdefault(name, []).append((labels, value))
+            for name in sorted(by_name):
+                kind, help_text, buckets = self._meta[name]
+                lines.append(f"# HELP {name} {_escape(help_text, quote=False)}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(by_name[name]):
+                    if kind != "histogram":
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float("inf"),), value[3]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(value[1])}")
+                    lines.append(f"{name}_count{_labels(labels)} {value[0]}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path):
+        """Atomically replace ``path`` with the current metrics."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _escape(text, quote=True):
+    text = text.replace("\\", "\\\\").replace("\n", "\\n")
+    return text.replace('"', '\\"') if quote else text
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe("agro_screen_render_seconds", "histogram", "Time to render one screen of the app.")
+REGISTRY.describe("agro_chart_build_seconds", "histogram", "Time to build the data and figure for a chart.")
+REGISTRY.describe("agro_pdf_build_seconds", "histogram", "Time to render PDF reports (single report or bulk ZIP).")
+REGISTRY.describe("agro_reruns_total", "counter", "Script reruns across all sessions.")
+REGISTRY.describe("agro_sessions_total", "counter", "Sessions that have rerun the app at least once.")
+REGISTRY.describe("agro_session_state_bytes", "histogram", "Approximate session_state size, sampled every tenth rerun.",
+                  buckets=BYTES_BUCKETS)
+REGISTRY.describe("agro_estimates", "gauge", "Estimates in the estimate store.")
+REGISTRY.describe("agro_api_request_seconds", "histogram", "Quote API request handling time.")
+REGISTRY.describe("agro_api_quotes_total", "counter", "Containers priced by the quote API.")
+
+
+# ---- export and profiling -----------------------------------------------
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serves ``GET /metrics`` from ``server.registry``."""
+
+    def do_GET(self):
+        if self.path != "/metrics":
+            self.send_error(404)
+            return
+        data = self.server.registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    """Serve ``/metrics`` from a daemon thread and return the server."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_textfile_writer(path, interval=15.0, registry=REGISTRY):
+    """Rewrite ``path`` every ``interval`` seconds from a daemon thread and return the thread."""
+    def write_forever():
+        while True:
+            try:
+                registry.write_textfile(path)
+            except OSError:
+                logger.exception("Could not write metrics to %s", path)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=write_forever, name="metrics-textfile", daemon=True)
+    thread.start()
+    return thread
+
+
+def profile(fn, *args, sort="cumulative", limit=40, **kwargs):
+    """Run ``fn`` under cProfile; returns ``(result, stats_text)``."""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+    return result, out.getvalue()
@@ -0,0 +1,114 @@
+"""Vectorized export pricing chain.
+
+The chain is the one behind "Calculate Estimate":
+
+    product value -> export cost (+ duty) -> FOB -> importer -> distributor -> retail
+
+``price_arrays`` runs it over any number of containers at once.  The
+operations are applied in the same order as the original scalar code, and
+product values are summed sequentially per container, so a batch of one
+gives exactly the numbers the single-container form used to produce.
+
+Only NumPy is needed here; table handling (CSV/Excel batches, DataFrames)
+lives in ``agro_engine.batch``.
+"""
+import numpy as np
+
+COST_FIELDS = ("transport", "packing", "fumigation", "customs")
+MARGIN_FIELDS = ("margin", "distributor_margin", "retailer_margin")
+
+# Defaults used by the Create Estimate form; batch files may omit these columns.
+DEFAULTS = {
+    "transport": 0.0,
+    "packing": 0.0,
+    "fumigation": 0.0,
+    "customs": 0.0,
+    "duty": 5.0,
+    "margin": 15.0,
+    "distributor_margin": 10.0,
+    "retailer_margin": 20.0,
+}
+RESULT_FIELDS = ("total_value", "margin", "fob_price", "retail_price")
+
+
+def price_arrays(line_container, quantity, unit_price, transport, packing, fumigation,
+                 customs, duty, margin, distributor_margin, retailer_margin):
+    """Price every container in one pass.
+
+    ``line_container`` holds, for each product line, the position of its
+    container in the per-container arrays.  Returns a dict of arrays: the
+    per-line ``line_total`` plus one entry per container for every stage of
+    the chain.
+    """
+    transport = np.asarray(transport, dtype=np.float64)
+    n = transport.shape[0]
+    quantity = np.asarray(quantity, dtype=np.float64)
+    unit_price = np.asarray(unit_price, dtype=np.float64)
+    line_total = quantity * unit_price
+    # bincount accumulates in line order, the same as the old sum() over products
+    total_product_value = np.bincount(np.asarray(line_container, dtype=np.intp),
+                                      weights=line_total, minlength=n).astype(np.float64, copy=False)
+    export_cost = ((transport + np.asarray(packing, dtype=np.float64)
+                    + np.asarray(fumigation, dtype=np.float64)
+                    + np.asarray(customs, dtype=np.float64))
+                   + (total_product_value * np.asarray(duty, dtype=np.float64) / 100))
+    fob_price = total_product_value + export_cost
+    importer_price = fob_price * (1 + np.asarray(margin, dtype=np.float64) / 100)
+    distributor_price = importer_price * (1 + np.asarray(distributor_margin, dtype=np.float64) / 100)
+    retail_price = distributor_price * (1 + np.asarray(retailer_margin, dtype=np.float64) / 100)
+    total_margin = np.zeros(n)
+    has_value = total_product_value != 0
+    total_margin[has_value] = ((retail_price[has_value] - total_product_value[has_value])
+                               / total_product_value[has_value] * 100)
+    return {
+        "line_total": line_total,
+        "total_product_value": total_product_value,
+        "export_cost": export_cost,
+        "fob_price": fob_price,
+        "importer_price": importer_price,
+        "distributor_price": distributor_price,
+        "retail_price": retail_price,
+        "margin": total_margin,
+        "total_value": retail_price,
+    }
+
+
+def price_container(products, transport, packing, fumigation, customs, duty,
+                    margin, distributor_margin, retailer_margin):
+    """Price a single container; ``products`` maps name -> {"quantity", "unit_price"}.
+
+    Returns the ``results`` dict stored on an estimate.
+    """
+    lines = list(products.values())
+    priced = price_arrays(
+        np.zeros(len(lines), dtype=np.intp),
+        [p["quantity"] for p in lines],
+        [p["unit_price"] for p in lines],
+        [transport], [packing], [fumigation], [customs], [duty],
+        [margin], [distributor_margin], [retailer_margin],
+    )
+    return {field: float(priced[field][0]) for field in RESULT_FIELDS}
+
+
+def reprice_estimate(estimate, rate_table):
+    """Re-price a stored estimate with transport at the freight rate in force on its date.
+
+    The importer, distributor and retailer margins are not stored, but their
+    combined mark-up is ``retail_price / fob_price``, which is all the chain
+    needs.  Returns ``(transport, results)``, or ``None`` when no rate was in
+    force on the estimate's date (unknown route, or a date before its first rate).
+    """
+    rate = rate_table.rate(estimate["destination"], estimate["date"])
+    if rate is None:
+        return None
+    products, costs, results = estimate["products"], estimate["costs"], estimate["results"]
+    transport = sum(p["quantity"] for p in products.values()) * rate
+    markup = results["retail_price"] / results["fob_price"] if results["fob_price"] else 1.0
+    priced = price_arrays(
+        np.zeros(len(products), dtype=np.intp),
+        [p["quantity"] for p in products.values()],
+        [p["unit_price"] for p in products.values()],
+        [transport], [costs["packing"]], [costs["fumigation"]], [costs["customs"]], [costs["duty"]],
+        [(markup - 1) * 100], [0.0], [0.0],
+    )
+    return transport, {field: float(priced[field][0]) for field in RESULT_FIELDS}
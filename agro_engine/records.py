@@ -0,0 +1,197 @@
+"""Compact, array-backed estimate records.
+
+An estimate held as the usual nested dict (``products`` dict of dicts,
+``costs``, ``results``, a ``datetime.date``) costs a few kilobytes of Python
+objects.  ``EstimateTable`` keeps the same data in NumPy columns instead:
+destinations, statuses and products are interned to small integer codes,
+container ids are packed bytes, and product lines are a flat block indexed
+by per-estimate offsets, for a couple of hundred bytes per estimate.
+
+Indexing the table returns an ``EstimateView``, a read-only mapping with the
+familiar keys, so code written against estimate dicts (reports, repricing,
+the History detail view) works unchanged.  Nested values are built on access.
+"""
+import datetime
+from collections.abc import Mapping, Sequence
+
+import numpy as np
+
+from .store import COST_KEYS, RESULT_KEYS
+
+ESTIMATE_KEYS = ("id", "container_id", "destination", "date", "products", "costs", "results", "status")
+LINE_KEYS = ("quantity", "unit_price", "total_value")
+
+
+class Interner:
+    """Two-way mapping between repeated strings and small integer codes."""
+
+    __slots__ = ("values", "_codes")
+
+    def __init__(self, values=()):
+        self.values = []
+        self._codes = {}
+        for value in values:
+            self.code(value)
+
+    def code(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def encode(self, values, dtype=np.int32):
+        return np.fromiter(map(self.code, values), dtype=dtype, count=len(values))
+
+    def __getitem__(self, code):
+        return self.values[code]
+
+    def __len__(self):
+        return len(self.values)
+
+
+class EstimateTable(Sequence):
+    """Read-only columnar estimates; ``table[i]`` is a dict-like ``EstimateView``."""
+
+    def __init__(self, ids, container_ids, destinations, dates, statuses, costs, results,
+                 line_offsets, line_products, line_values, interned):
+        self.ids = ids                      # int64 (n,)
+        self.container_ids = container_ids  # packed UTF-8 bytes (n,)
+        self.destinations = destinations    # int16 codes into interned["destination"]
+        self.dates = dates                  # datetime64[D] (n,), NaT when unparseable
+        self.statuses = statuses            # int8 codes into interned["status"]
+        self.costs = costs                  # float64 (n, len(COST_KEYS)), NaN when missing
+        self.results = results              # float64 (n, len(RESULT_KEYS))
+        self.line_offsets = line_offsets    # int64 (n + 1,): lines of row i are offsets[i]:offsets[i + 1]
+        self.line_products = line_products  # int32 codes into interned["product"]
+        self.line_values = line_values      # float64 (lines, len(LINE_KEYS))
+        self.interned = interned
+
+    @classmethod
+    def from_rows(cls, estimate_chunks, line_chunks):
+        """Build a table from chunks of store rows.
+
+        ``estimate_chunks`` yields lists of ``ESTIMATE_COLUMNS`` tuples in the
+        order the table should have; ``line_chunks`` yields lists of
+        ``(estimate_id, product, quantity, unit_price, total_value)`` tuples
+        sorted by estimate id.  Only one chunk of Python rows is alive at a
+        time.
+        """
+        interned = {"destination": Interner(), "status": Interner(), "product": Interner()}
+        n_costs = len(COST_KEYS)
+        parts = []
+        for rows in estimate_chunks:
+            columns = list(zip(*rows))
+            parts.append((
+                np.array(columns[0], dtype=np.int64),
+                np.array([value.encode() for value in columns[1]], dtype=np.bytes_),
+                interned["destination"].encode(columns[2], np.int16),
+                np.array(columns[3], dtype="datetime64[D]"),
+                interned["status"].encode(columns[4], np.int8),
+                np.array([row[5:5 + n_costs] for row in rows], dtype=np.float64),
+                np.array([row[5 + n_costs:] for row in rows], dtype=np.float64),
+            ))
+        line_parts = []
+        for rows in line_chunks:
+            columns = list(zip(*rows))
+            line_parts.append((
+                np.array(columns[0], dtype=np.int64),
+                interned["product"].encode(columns[1]),
+                np.array([row[2:] for row in rows], dtype=np.float64),
+            ))
+
+        if parts:
+            ids, container_ids, destinations, dates, statuses, costs, results = map(np.concatenate, zip(*parts))
+        else:
+            ids, container_ids = np.zeros(0, np.int64), np.zeros(0, np.bytes_)
+            destinations, dates = np.zeros(0, np.int16), np.zeros(0, "datetime64[D]")
+            statuses = np.zeros(0, np.int8)
+            costs, results = np.zeros((0, n_costs)), np.zeros((0, len(RESULT_KEYS)))
+        if line_parts:
+            line_estimates, line_products, line_values = map(np.concatenate, zip(*line_parts))
+        else:
+            line_estimates, line_products = np.zeros(0, np.int64), np.zeros(0, np.int32)
+            line_values = np.zeros((0, len(LINE_KEYS)))
+
+        # Lines arrive in estimate-id order; gather them into table order
+        order = np.argsort(ids, kind="stable")
+        starts = np.empty(len(ids), dtype=np.int64)
+        counts = np.empty(len(ids), dtype=np.int64)
+        starts[order] = np.searchsorted(line_estimates, ids[order], "left")
+        counts[order] = np.searchsorted(line_estimates, ids[order], "right") - starts[order]
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        gather = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+        return cls(ids, container_ids, destinations, dates, statuses, costs, results,
+                   offsets, line_products[gather], line_values[gather], interned)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return EstimateView(self, row)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays (interned strings excluded; they are shared and few)."""
+        return sum(a.nbytes for a in (self.ids, self.container_ids, self.destinations, self.dates, self.statuses,
+                                      self.costs, self.results, self.line_offsets, self.line_products,
+                                      self.line_values))
+
+    # ---- per-row accessors used by EstimateView ---------------------------
+
+    def value(self, row, key):
+        if key == "id":
+            return int(self.ids[row])
+        if key == "container_id":
+            return self.container_ids[row].decode()
+        if key == "destination":
+            return self.interned["destination"][self.destinations[row]]
+        if key == "date":
+            return self.dates[row].astype(datetime.date)
+        if key == "status":
+            return self.interned["status"][self.statuses[row]]
+        if key == "costs":
+            return dict(zip(COST_KEYS, _optional(self.costs[row])))
+        if key == "results":
+            return dict(zip(RESULT_KEYS, _optional(self.results[row])))
+        if key == "products":
+            start, stop = self.line_offsets[row], self.line_offsets[row + 1]
+            products = self.interned["product"]
+            return {products[code]: dict(zip(LINE_KEYS, _optional(values)))
+                    for code, values in zip(self.line_products[start:stop], self.line_values[start:stop])}
+        raise KeyError(key)
+
+
+class EstimateView(Mapping):
+    """One row of an ``EstimateTable`` with the keys of an estimate dict."""
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def __getitem__(self, key):
+        return self._table.value(self._row, key)
+
+    def __iter__(self):
+        return iter(ESTIMATE_KEYS)
+
+    def __len__(self):
+        return len(ESTIMATE_KEYS)
+
+    def __repr__(self):
+        return f"EstimateView({dict(self)!r})"
+
+
+def _optional(values):
+    # Missing numbers are stored as NaN and read back as None, as the store returns them
+    return [None if value != value else value for value in values.tolist()]
+
@@ -0,0 +1,145 @@
+"""PDF estimate reports.
+
+Reports are rendered only when asked for and cached by a hash of their
+content, so reruns that merely show the download button cost nothing.
+``write_reports_zip`` renders many reports in a process pool and streams
+them into a single ZIP file as they finish.  ReportLab is imported inside
+the rendering function so importing this module stays cheap.
+"""
+import collections
+import hashlib
+import json
+import multiprocessing
+import re
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from .metrics import REGISTRY
+
+
+def report_key(data, username):
+    """Content hash of a report's inputs (``container_id``, ``products``, ``results``)."""
+    payload = {
+        "container_id": data["container_id"],
+        "products": data["products"],
+        "results": data["results"],
+        "username": username,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def report_filename(data):
+    """``<container_id>_report.pdf``, safe as a download name and a ZIP entry.
+
+    Container IDs are free text; anything but letters, digits, ``.``, ``_``
+    and ``-`` becomes ``_`` and leading dots are dropped, so an ID such as
+    ``../x`` cannot escape the folder a ZIP is extracted into.
+    """
+    name = re.sub(r"[^\w.-]", "_", str(data["container_id"]), flags=re.ASCII).lstrip(".")
+    return f"{name or 'estimate'}_report.pdf"
+
+
+def build_estimate_pdf(data, username):
+    """Render the export estimate report for ``data`` and return the PDF bytes."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = [
+        Paragraph(f"Export Estimate Report - {data['container_id']}", styles['Title']),
+        Spacer(1, 12),
+        Paragraph(f"Prepared by: {username}", styles['Normal']),
+        Spacer(1, 12)
+    ]
+    table_data = [["Product", "Qty", "Unit Price", "Total Value"]]
+    for k, v in data["products"].items():
+        table_data.append([k, v["quantity"], f"${v['unit_price']:,.2f}", f"${v['total_value']:,.2f}"])
+    table_data.append(["", "", "Retail Price", f"${data['results']['retail_price']:,.2f}"])
+    table = Table(table_data)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor("#2c3e50")),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    story.append(table)
+    doc.build(story)
+    return buffer.getvalue()
+
+
+class ReportCache:
+    """Small thread-safe LRU of rendered reports keyed by ``report_key``."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is not None:
+                self._entries.move_to_end(key)
+            return pdf
+
+    def get_or_build(self, data, username):
+        key = report_key(data, username)
+        pdf = self.get(key)
+        if pdf is None:
+            with REGISTRY.time("agro_pdf_build_seconds", kind="single"):
+                pdf = build_estimate_pdf(data, username)
+            with self._lock:
+                self._entries[key] = pdf
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return pdf
+
+
+def _render(args):
+    data, username = args
+    return report_filename(data), build_estimate_pdf(data, username)
+
+
+def _pool_context():
+    # Forking the multi-threaded Streamlit server can copy locks held by other threads (the import
+    # lock among them) into workers that then import ReportLab; start them from a clean process
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    # The server is single-threaded, so it can import ReportLab once for every worker it forks
+    context.set_forkserver_preload(["__main__", "agro_engine.reports", "reportlab.platypus", "reportlab.lib.styles"])
+    return context
+
+
+def write_reports_zip(estimates, username, fileobj, max_workers=None, chunksize=16):
+    """Render a report per estimate in a process pool and write them into a ZIP on ``fileobj``.
+
+    Reports are written as workers return them, in input order, so only a
+    few PDFs are held in memory at a time.  Workers are started with
+    ``forkserver`` (``spawn`` where that is unavailable), never forked from
+    the calling process.  Returns the number of reports.
+    """
+    jobs = ((_report_data(est), username) for est in estimates)
+    count = 0
+    # PDFs are already compressed; storing them keeps the ZIP step cheap
+    with REGISTRY.time("agro_pdf_build_seconds", kind="bulk_zip"), \
+            zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_STORED) as archive, \
+            ProcessPoolExecutor(max_workers=max_workers, mp_context=_pool_context()) as pool:
+        seen = collections.Counter()
+        for filename, pdf in pool.map(_render, jobs, chunksize=chunksize):
+            seen[filename] += 1
+            if seen[filename] > 1:
+                filename = filename.replace("_report.pdf", f"_report_{seen[filename]}.pdf")
+            archive.writestr(filename, pdf)
+            count += 1
+    return count
+
+
+def _report_data(estimate):
+    return {"container_id": estimate["container_id"], "products": estimate["products"],
+            "results": estimate["results"]}
@@ -0,0 +1,111 @@
+"""Monte Carlo and sensitivity analysis for a single container estimate.
+
+The uncertain inputs are freight (a multiplier on transport), export duty,
+FX (a multiplier on the USD cost of the products) and the importer,
+distributor and retailer margins.  Every function pushes whole arrays of
+scenarios through the FOB -> importer -> distributor -> retail chain with
+NumPy broadcasting, so a million samples take well under a second.
+"""
+import numpy as np
+
+INPUTS = ("freight", "duty", "fx", "margin", "distributor_margin", "retailer_margin")
+INPUT_LABELS = {
+    "freight": "Freight",
+    "duty": "Export Duty",
+    "fx": "FX Rate",
+    "margin": "Importer Margin",
+    "distributor_margin": "Distributor Margin",
+    "retailer_margin": "Retailer Margin",
+}
+# Freight and FX spreads are % of the base value; the others are percentage points
+DEFAULT_SPREAD = {"freight": 15.0, "duty": 1.0, "fx": 5.0, "margin": 2.0, "distributor_margin": 2.0,
+                  "retailer_margin": 3.0}
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def base_inputs(product_value, costs, margin, distributor_margin, retailer_margin):
+    """Collect the base case from a computed estimate."""
+    return {
+        "product_value": float(product_value),
+        "transport": float(costs["transport"]),
+        "other_costs": float(costs["packing"] + costs["fumigation"] + costs["customs"]),
+        "freight": 1.0,
+        "duty": float(costs["duty"]),
+        "fx": 1.0,
+        "margin": float(margin),
+        "distributor_margin": float(distributor_margin),
+        "retailer_margin": float(retailer_margin),
+    }
+
+
+def evaluate(base, **overrides):
+    """Run the pricing chain with any inputs replaced by arrays; returns fob, retail and margin arrays."""
+    inputs = {name: overrides.get(name, base[name]) for name in INPUTS}
+    product_value = base["product_value"] * np.asarray(inputs["fx"], dtype=np.float64)
+    export_cost = ((base["transport"] * np.asarray(inputs["freight"], dtype=np.float64) + base["other_costs"])
+                   + product_value * np.asarray(inputs["duty"], dtype=np.float64) / 100)
+    fob_price = product_value + export_cost
+    retail_price = (fob_price * (1 + np.asarray(inputs["margin"], dtype=np.float64) / 100)
+                    * (1 + np.asarray(inputs["distributor_margin"], dtype=np.float64) / 100)
+                    * (1 + np.asarray(inputs["retailer_margin"], dtype=np.float64) / 100))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total_margin = np.where(product_value != 0, (retail_price - product_value) / product_value * 100, 0.0)
+    return {"fob_price": fob_price, "retail_price": retail_price, "margin": total_margin}
+
+
+def sample_inputs(base, spread, n, seed=None):
+    """Draw ``n`` scenarios, each input normal around its base value and clipped at zero."""
+    rng = np.random.default_rng(seed)
+    samples = {}
+    for name in INPUTS:
+        sd = spread.get(name, 0.0)
+        if name in ("freight", "fx"):
+            sd = base[name] * sd / 100
+        if sd <= 0:
+            continue
+        draw = rng.standard_normal(n)
+        draw *= sd
+        draw += base[name]
+        samples[name] = np.maximum(draw, 0.0, out=draw)
+    return samples
+
+
+def simulate(base, spread, n=1_000_000, target_margin=None, seed=None):
+    """Monte Carlo summary: percentile bands per output and the chance of missing ``target_margin``."""
+    outputs = evaluate(base, **sample_inputs(base, spread, n, seed))
+    summary = {
+        "percentiles": {name: dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist()))
+                        for name, values in outputs.items()},
+        "mean": {name: float(values.mean()) for name, values in outputs.items()},
+        "samples": n,
+    }
+    if target_margin is not None:
+        summary["p_below_target"] = float(np.count_nonzero(outputs["margin"] < target_margin) / n)
+    # A fixed-size histogram is enough for plotting and keeps the payload small
+    counts, edges = np.histogram(outputs["margin"], bins=100)
+    summary["margin_histogram"] = (counts, edges)
+    return summary
+
+
+def tornado(base, spread, z=1.2816, output="margin"):
+    """One-at-a-time sensitivity: ``output`` with each input at base -/+ ``z`` spreads (p10/p90 by default).
+
+    Returns rows of ``(input, low, high)`` sorted by swing, largest first.
+    """
+    names = [name for name in INPUTS if spread.get(name, 0.0) > 0]
+    rows = []
+    for name in names:
+        sd = spread[name] * (base[name] / 100 if name in ("freight", "fx") else 1.0)
+        values = np.maximum(np.array([base[name] - z * sd, base[name] + z * sd]), 0.0)
+        low, high = evaluate(base, **{name: values})[output]
+        rows.append((name, float(low), float(high)))
+    return sorted(rows, key=lambda row: abs(row[2] - row[1]), reverse=True)
+
+
+def sweep(base, x_input, x_values, y_input, y_values, output="margin"):
+    """``output`` over a grid of two inputs (rows follow ``y_values``, columns ``x_values``)."""
+    if x_input == y_input:
+        raise ValueError("Sweep needs two different inputs")
+    x = np.asarray(x_values, dtype=np.float64)[None, :]
+    y = np.asarray(y_values, dtype=np.float64)[:, None]
+    return evaluate(base, **{x_input: x, y_input: y})[output] * np.ones((y.shape[0], x.shape[1]))
@@ -0,0 +1,139 @@
+"""Reverse pricing: the highest unit purchase price that still meets a target.
+
+The forward chain (``agro_engine.pricing``) for a container with product
+value ``V``, fixed export costs ``F`` (transport, packing, fumigation,
+customs), duty ``d`` and mark-up ``M = (1 + margin)(1 + distributor)(1 +
+retailer)`` is::
+
+    retail = (V * (1 + d) + F) * M        margin = (retail - V) / V
+
+It is affine in ``V``, so for a product that fills its own container
+(``V = quantity * price``) both targets invert in closed form::
+
+    retail target r per unit:   price = (r / M - F / quantity) / (1 + d)
+    margin target t:            V = F * M / (1 + t - (1 + d) * M)
+
+When the product joins lines already loaded (value ``V0``), the fixed
+costs are shared by value, so the line's retail per unit is
+``M * price * ((1 + d) + F / (V0 + quantity * price))``.  A retail target
+is then no longer linear in the price; it is solved by vectorized
+bisection (the function is increasing in the price).  The margin target
+stays closed form because the container margin does not depend on how
+``V`` is split.
+
+Every input broadcasts, so a whole product x destination x scenario grid
+is solved in one call.
+"""
+import numpy as np
+import pandas as pd
+
+from .freight import DEFAULT_ORIGIN
+from .pricing import DEFAULTS, MARGIN_FIELDS
+
+TARGETS = ("retail_price", "margin")
+GRID_COLUMNS = ("product", "destination", "scenario", "target", "quantity", "freight_rate", "transport",
+                "max_unit_price")
+
+
+def solve_max_price(target, quantity, fixed_costs, duty, margin, distributor_margin, retailer_margin,
+                    kind="retail_price", base_value=0.0, tol=1e-9, max_iter=200):
+    """Highest unit price for ``quantity`` units that meets ``target``; all arguments broadcast.
+
+    ``kind="retail_price"``: ``target`` is the retail price per unit of this
+    product (its value share of the container's retail price).
+    ``kind="margin"``: ``target`` is the container's total margin in %.
+    ``base_value`` is the value of lines already in the container.  Duty
+    and margins are percentages, as in ``price_arrays``.
+
+    Returns an array of prices shaped like the broadcast inputs: NaN where
+    an input is missing or no positive price meets the target, ``inf`` for
+    a margin target that every price meets.
+    """
+    if kind not in TARGETS:
+        raise ValueError(f"kind must be one of {TARGETS}, not {kind!r}")
+    arrays = np.broadcast_arrays(*(np.asarray(value, dtype=np.float64) for value in
+                                   (target, quantity, fixed_costs, duty, base_value, margin, distributor_margin,
+                                    retailer_margin)))
+    shape = arrays[0].shape
+    # Work on flat arrays so scalars and any broadcast shape take the same path
+    target, quantity, fixed_costs, duty, base_value, *margins = (a.ravel() for a in arrays)
+    markup = (1 + margins[0] / 100) * (1 + margins[1] / 100) * (1 + margins[2] / 100)
+    duty_factor = 1 + duty / 100
+    # A missing input (e.g. NaN transport for a route without a freight rate) has no answer
+    valid = (np.isfinite(target) & np.isfinite(fixed_costs) & np.isfinite(duty_factor) & np.isfinite(markup)
+             & np.isfinite(base_value) & (quantity > 0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if kind == "margin":
+            denominator = 1 + target / 100 - duty_factor * markup
+            product_value = np.where(denominator > 0, fixed_costs * markup / denominator, np.inf)
+            price = (product_value - base_value) / quantity
+        else:
+            price = (target / markup - fixed_costs / quantity) / duty_factor
+            shared = valid & (base_value > 0)
+            if shared.any():
+                price[shared] = _bisect_line_retail(target[shared], quantity[shared], fixed_costs[shared],
+                                                    duty_factor[shared], markup[shared], base_value[shared],
+                                                    tol, max_iter)
+    return np.where(valid & (price > 0), price, np.nan).reshape(shape)
+
+
+def _bisect_line_retail(target, quantity, fixed_costs, duty_factor, markup, base_value, tol, max_iter):
+    # Line retail per unit M * p * ((1 + d) + F / (V0 + q * p)) rises with p from 0, and is at least
+    # M * (1 + d) * p, so the root lies in [0, r / (M * (1 + d))]
+    lo = np.zeros_like(target)
+    hi = np.maximum(target / (markup * duty_factor), 0.0)
+    for _ in range(max_iter):
+        mid = (lo + hi) / 2
+        above = markup * mid * (duty_factor + fixed_costs / (base_value + quantity * mid)) > target
+        hi = np.where(above, mid, hi)
+        lo = np.where(above, lo, mid)
+        if np.all(hi - lo <= tol * np.maximum(hi, 1.0)):
+            break
+    # The lower end never overshoots the target
+    return lo
+
+
+def buying_grid(targets, scenarios, rate_table, kind="retail_price", quantity=20.0, other_costs=0.0,
+                duty=DEFAULTS["duty"], base_value=0.0, base_quantity=0.0, on=None, origin=DEFAULT_ORIGIN):
+    """Solve every target row under every margin scenario in one batch.
+
+    ``targets`` has ``product``, ``destination`` and ``target`` columns
+    (and optionally ``quantity``, overriding the default units per
+    container).  ``scenarios`` has a ``scenario`` name plus the
+    ``MARGIN_FIELDS``.  Transport is the route's freight rate on ``on``
+    (default today) times the container's quantity, as on Create Estimate;
+    routes without a rate give NaN.  Returns one row per target x
+    scenario with the ``GRID_COLUMNS``.
+    """
+    targets = pd.DataFrame(targets)
+    scenarios = pd.DataFrame(scenarios)
+    n_targets, n_scenarios = len(targets), len(scenarios)
+    cell_quantity = (pd.to_numeric(targets["quantity"], errors="coerce").to_numpy(dtype=np.float64)
+                     if "quantity" in targets else np.full(n_targets, float(quantity)))
+    destinations = targets["destination"].to_numpy(dtype=object)
+    # One rate lookup per destination, not per cell
+    unique_destinations, codes = np.unique(destinations.astype(str), return_inverse=True)
+    rates = rate_table.rates_for(unique_destinations, [on or pd.Timestamp.today().normalize()]
+                                 * len(unique_destinations), origin)[codes]
+    transport = (cell_quantity + base_quantity) * rates
+
+    # Targets vary fastest within each scenario block
+    def repeat(values):
+        return np.tile(np.asarray(values), n_scenarios)
+
+    def expand(field):
+        return np.repeat(pd.to_numeric(scenarios[field]).to_numpy(dtype=np.float64), n_targets)
+
+    target = repeat(pd.to_numeric(targets["target"], errors="coerce").to_numpy(dtype=np.float64))
+    price = solve_max_price(target, repeat(cell_quantity), repeat(transport) + other_costs, duty,
+                            *(expand(field) for field in MARGIN_FIELDS), kind=kind, base_value=base_value)
+    return pd.DataFrame({
+        "product": repeat(targets["product"].to_numpy(dtype=object)),
+        "destination": repeat(destinations),
+        "scenario": np.repeat(scenarios["scenario"].to_numpy(dtype=object), n_targets),
+        "target": target,
+        "quantity": repeat(cell_quantity),
+        "freight_rate": repeat(rates),
+        "transport": repeat(transport),
+        "max_unit_price": price,
+    }, columns=list(GRID_COLUMNS))
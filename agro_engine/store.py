@@ -0,0 +1,498 @@
+"""Persistent estimate storage backed by SQLite.
+
+Estimates keep the same shape the screens have always used::
+
+    {"container_id", "destination", "date", "products": {name: {...}},
+     "costs": {...}, "results": {...}, "status"}
+
+but live in two indexed tables (one row per estimate, one row per product
+line) so screens can filter and page through history instead of scanning a
+list held in the session.
+"""
+import contextlib
+import datetime
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .aggregates import EstimateAggregates
+
+DEFAULT_DB_PATH = os.environ.get(
+    "AGRO_DB_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agro_estimates.db")
+)
+COST_KEYS = ("transport", "packing", "fumigation", "customs", "duty")
+RESULT_KEYS = ("total_value", "margin", "fob_price", "retail_price")
+ESTIMATE_COLUMNS = ("id", "container_id", "destination", "date", "status") + COST_KEYS + RESULT_KEYS
+LINE_FRAME_COLUMNS = ("line_id", "estimate_id", "container_id", "destination", "date", "status", "product",
+                      "quantity", "unit_price", "line_value", "total_value", "margin", "retail_price")
+LINE_TEXT_COLUMNS = ("container_id", "destination", "status", "product")
+CHUNK_ROWS = 50_000
+LINE_EXPORT_COLUMNS = (("estimate_id",) + ESTIMATE_COLUMNS[1:]
+                       + ("line_id", "product", "quantity", "unit_price", "line_value"))
+SORT_COLUMNS = ("date", "container_id", "destination", "status", "total_value", "margin", "retail_price")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS estimates (
+    id INTEGER PRIMARY KEY,
+    container_id TEXT NOT NULL,
+    destination TEXT NOT NULL,
+    date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'active',
+    transport REAL, packing REAL, fumigation REAL, customs REAL, duty REAL,
+    total_value REAL, margin REAL, fob_price REAL, retail_price REAL
+);
+CREATE TABLE IF NOT EXISTS estimate_lines (
+    id INTEGER PRIMARY KEY,
+    estimate_id INTEGER NOT NULL REFERENCES estimates(id) ON DELETE CASCADE,
+    product TEXT NOT NULL,
+    quantity REAL, unit_price REAL, total_value REAL
+);
+CREATE INDEX IF NOT EXISTS ix_estimates_date ON estimates(date);
+CREATE INDEX IF NOT EXISTS ix_estimates_destination ON estimates(destination, date);
+CREATE INDEX IF NOT EXISTS ix_estimates_container ON estimates(container_id);
+CREATE INDEX IF NOT EXISTS ix_estimates_destination_id ON estimates(destination);
+CREATE INDEX IF NOT EXISTS ix_estimates_status ON estimates(status);
+CREATE INDEX IF NOT EXISTS ix_estimates_retail_price ON estimates(retail_price);
+CREATE INDEX IF NOT EXISTS ix_estimates_margin ON estimates(margin);
+CREATE INDEX IF NOT EXISTS ix_lines_product ON estimate_lines(product, estimate_id);
+CREATE INDEX IF NOT EXISTS ix_lines_estimate ON estimate_lines(estimate_id);
+-- Counts updates and deletes from every connection, so a store can tell them from appends
+CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO store_meta (key, value) VALUES ('changes', 0);
+CREATE TRIGGER IF NOT EXISTS tr_estimates_update AFTER UPDATE ON estimates
+BEGIN UPDATE store_meta SET value = value + 1 WHERE key = 'changes'; END;
+CREATE TRIGGER IF NOT EXISTS tr_estimates_delete AFTER DELETE ON estimates
+BEGIN UPDATE store_meta SET value = value + 1 WHERE key = 'changes'; END;
+CREATE TRIGGER IF NOT EXISTS tr_lines_update AFTER UPDATE ON estimate_lines
+BEGIN UPDATE store_meta SET value = value + 1 WHERE key = 'changes'; END;
+CREATE TRIGGER IF NOT EXISTS tr_lines_delete AFTER DELETE ON estimate_lines
+BEGIN UPDATE store_meta SET value = value + 1 WHERE key = 'changes'; END;
+"""
+
+
+class EstimateStore:
+    """Thread-safe SQLite estimate store shared by every session of the app."""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._aggregates = self._compute_aggregates()
+        # Bumped on every update or delete; appends are tracked by line id instead
+        self._mutations = 0
+        self._distinct = {}
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._changes, self._max_id = self._write_state()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    @property
+    def aggregates(self):
+        """Running dashboard aggregates, including writes made by other connections."""
+        with self._lock:
+            self._sync()
+            return self._aggregates
+
+    @property
+    def mutations(self):
+        with self._lock:
+            self._sync()
+            return self._mutations
+
+    def _sync(self):
+        # Other connections (the CLI, another app process) commit behind our back; data_version
+        # changes only for their commits, so this is one cheap pragma per call otherwise
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        changes, max_id = self._write_state()
+        if changes != self._changes:
+            # Updates or deletes can touch any row: rebuild and tell derived tables to reload
+            self._aggregates = self._compute_aggregates()
+            self._mutations += 1
+        elif max_id > self._max_id:
+            self._aggregates.add_groups(self._conn.execute(
+                "SELECT status, destination, COUNT(*), SUM(total_value), SUM(margin) "
+                "FROM estimates WHERE id > ? GROUP BY status, destination", (self._max_id,)))
+        self._changes, self._max_id = changes, max_id
+
+    def _write_state(self):
+        return self._conn.execute("SELECT (SELECT value FROM store_meta WHERE key = 'changes'), "
+                                  "(SELECT COALESCE(MAX(id), 0) FROM estimates)").fetchone()
+
+    @contextlib.contextmanager
+    def _write(self):
+        # Take SQLite's write lock before reading anything the write depends on (the next id, the
+        # row being changed); sqlite3 would otherwise only begin at the first INSERT, and another
+        # connection could commit in between
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._sync()
+            yield
+
+    # ---- writes ---------------------------------------------------------
+
+    def add(self, estimate):
+        """Store one estimate and return its id."""
+        return self.add_many([estimate])[0]
+
+    def add_many(self, estimates):
+        """Store estimates in a single transaction and return their ids."""
+        estimates = list(estimates)
+        with self._write():
+            first_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM estimates").fetchone()[0]
+            ids = list(range(first_id, first_id + len(estimates)))
+            self._conn.executemany(
+                f"INSERT INTO estimates ({', '.join(ESTIMATE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(ESTIMATE_COLUMNS))})",
+                (_estimate_row(est_id, est) for est_id, est in zip(ids, estimates)),
+            )
+            self._conn.executemany(
+                "INSERT INTO estimate_lines (estimate_id, product, quantity, unit_price, total_value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                ((est_id, product, d.get("quantity"), d.get("unit_price"), d.get("total_value"))
+                 for est_id, est in zip(ids, estimates)
+                 for product, d in est.get("products", {}).items()),
+            )
+            for est in estimates:
+                self._aggregates.add(est)
+            self._max_id = max(ids, default=self._max_id)
+        return ids
+
+    def add_frame(self, estimates, lines):
+        """Store a table of estimates and their lines in one transaction; returns the new ids.
+
+        ``estimates`` has the ``ESTIMATE_COLUMNS`` except ``id`` (dates as
+        ISO strings); ``lines`` has ``estimate`` (row position in
+        ``estimates``), ``product``, ``quantity``, ``unit_price`` and
+        ``total_value``.  Rows go to SQLite straight from the columns, with no
+        estimate dict built per row.
+        """
+        columns = ESTIMATE_COLUMNS[1:]
+        with self._write():
+            first_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM estimates").fetchone()[0]
+            ids = np.arange(first_id, first_id + len(estimates), dtype=np.int64)
+            self._conn.executemany(
+                f"INSERT INTO estimates ({', '.join(ESTIMATE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(ESTIMATE_COLUMNS))})",
+                zip(ids.tolist(), *(estimates[c].tolist() for c in columns)),
+            )
+            self._conn.executemany(
+                "INSERT INTO estimate_lines (estimate_id, product, quantity, unit_price, total_value) "
+                "VALUES (?, ?, ?, ?, ?)",
+                zip(ids[lines["estimate"].to_numpy()].tolist(),
+                    *(lines[c].tolist() for c in ("product", "quantity", "unit_price", "total_value"))),
+            )
+            groups = (estimates.assign(count=1, total_value=estimates["total_value"].fillna(0.0),
+                                       margin=estimates["margin"].fillna(0.0))
+                      .groupby(["status", "destination"], sort=False)[["count", "total_value", "margin"]].sum()
+                      .reset_index())
+            self._aggregates.add_groups(zip(groups["status"], groups["destination"], groups["count"].tolist(),
+                                            groups["total_value"].tolist(), groups["margin"].tolist()))
+            self._max_id = max(int(ids[-1]), self._max_id) if len(ids) else self._max_id
+        return ids.tolist()
+
+    def set_status(self, estimate_id, status):
+        """Change an estimate's status, keeping the running aggregates in step."""
+        with self._write():
+            estimate = self._aggregate_row(estimate_id)
+            if estimate is None:
+                raise KeyError(estimate_id)
+            self._conn.execute("UPDATE estimates SET status = ? WHERE id = ?", (status, estimate_id))
+            self._aggregates.change_status(estimate, status)
+            self._mutations += 1
+            self._changes, self._max_id = self._write_state()
+
+    def delete(self, estimate_id):
+        """Delete an estimate and its product lines."""
+        with self._write():
+            estimate = self._aggregate_row(estimate_id)
+            if estimate is None:
+                raise KeyError(estimate_id)
+            self._conn.execute("DELETE FROM estimates WHERE id = ?", (estimate_id,))
+            self._aggregates.remove(estimate)
+            self._mutations += 1
+            self._changes, self._max_id = self._write_state()
+
+    # ---- aggregates -----------------------------------------------------
+
+    def verify_aggregates(self, repair=True):
+        """Recompute the aggregates from the table and return the differences found.
+
+        With ``repair`` the running aggregates are replaced by the rebuilt ones.
+        """
+        with self._lock:
+            self._sync()
+            rebuilt = self._compute_aggregates()
+            diffs = self._aggregates.differences(rebuilt)
+            if repair:
+                self._aggregates = rebuilt
+        return diffs
+
+    def _compute_aggregates(self):
+        with self._lock:
+            return EstimateAggregates.from_groups(self._conn.execute(
+                "SELECT status, destination, COUNT(*), SUM(total_value), SUM(margin) "
+                "FROM estimates GROUP BY status, destination"))
+
+    def _aggregate_row(self, estimate_id):
+        row = self._conn.execute("SELECT status, destination, total_value, margin FROM estimates WHERE id = ?",
+                                 (estimate_id,)).fetchone()
+        if row is None:
+            return None
+        status, destination, total_value, margin = row
+        return {"status": status, "destination": destination,
+                "results": {"total_value": total_value, "margin": margin}}
+
+    # ---- reads ----------------------------------------------------------
+
+    def count(self, **filters):
+        where, params = _where(**filters)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM estimates{where}", params).fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def query(self, limit=None, offset=0, order_by="date", descending=True, **filters):
+        """Return matching estimates as dicts, one page at a time.
+
+        Filters: ``date_from``, ``date_to``, ``destination``, ``product``,
+        ``status`` and ``container_id`` (substring match).
+        """
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort estimates by {order_by!r}")
+        where, params = _where(**filters)
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT {', '.join(ESTIMATE_COLUMNS)} FROM estimates{where} "
+               f"ORDER BY {order_by} {direction}, id {direction}")
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [int(limit), int(offset)]
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            lines = self._lines_for([row[0] for row in rows])
+        return [_estimate_dict(row, lines.get(row[0], {})) for row in rows]
+
+    def estimate_table(self, order_by="date", descending=False, **filters):
+        """Return all matching estimates as a compact ``EstimateTable`` (see ``agro_engine.records``).
+
+        Rows are read in chunks straight into NumPy columns, so memory stays
+        at a few hundred bytes per estimate instead of a nested dict each.
+        """
+        from .records import EstimateTable
+
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort estimates by {order_by!r}")
+        where, params = _where(**filters)
+        direction = "DESC" if descending else "ASC"
+        with self._lock:
+            estimates = self._conn.execute(
+                f"SELECT {', '.join(ESTIMATE_COLUMNS)} FROM estimates{where} "
+                f"ORDER BY {order_by} {direction}, id {direction}", params)
+            lines = self._conn.execute(
+                "SELECT estimate_id, product, quantity, unit_price, total_value FROM estimate_lines"
+                + (f" WHERE estimate_id IN (SELECT id FROM estimates{where})" if where else "")
+                + " ORDER BY estimate_id, id", params)
+            return EstimateTable.from_rows(_chunks(estimates), _chunks(lines))
+
+    def get(self, estimate_id):
+        """Return a single estimate with its product lines, or ``None``."""
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(ESTIMATE_COLUMNS)} FROM estimates WHERE id = ?",
+                                     (estimate_id,)).fetchone()
+            if row is None:
+                return None
+            return _estimate_dict(row, self._lines_for([estimate_id]).get(estimate_id, {}))
+
+    def estimates_frame(self, columns=ESTIMATE_COLUMNS, limit=None, offset=0, order_by="date", descending=False,
+                        **filters):
+        """Return estimate-level columns as a DataFrame (``date`` parsed), optionally one page of it."""
+        unknown = set(columns) - set(ESTIMATE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown estimate columns: {', '.join(sorted(unknown))}")
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort estimates by {order_by!r}")
+        where, params = _where(**filters)
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT {', '.join(columns)} FROM estimates{where} "
+               f"ORDER BY {order_by} {direction}, id {direction}")
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [int(limit), int(offset)]
+        with self._lock:
+            df = pd.read_sql_query(sql, self._conn, params=params)
+        if "date" in df:
+            df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        return df
+
+    def lines_frame(self, after_line_id=None, **filters):
+        """Return one row per product line joined with its estimate's date, destination and results.
+
+        ``after_line_id`` limits the result to lines stored after that one,
+        for callers that extend a table they already hold.  Container id,
+        destination, status and product are categoricals, which keeps the
+        table to roughly 90 bytes per line.
+        """
+        where, params = _where(prefix="e.", **filters)
+        if after_line_id is not None:
+            where = (where + " AND" if where else " WHERE") + " l.id > ?"
+            params.append(int(after_line_id))
+        with self._lock:
+            cursor = self._conn.execute(
+                "SELECT l.id, e.id, e.container_id, e.destination, e.date, e.status, "
+                "l.product, l.quantity, l.unit_price, l.total_value, "
+                "e.total_value, e.margin, e.retail_price "
+                f"FROM estimates e JOIN estimate_lines l ON l.estimate_id = e.id{where} "
+                "ORDER BY l.id", params)
+            return _lines_frame(_chunks(cursor))
+
+    def line_chunks(self, chunk_size=CHUNK_ROWS, **filters):
+        """Yield matching product lines with their estimate's columns, ``chunk_size`` rows per DataFrame.
+
+        Pages are fetched by line id, and the store lock is held only while a
+        page is read, so a slow consumer never blocks other sessions.
+        """
+        where, params = _where(prefix="e.", **filters)
+        where = (where + " AND" if where else " WHERE") + " l.id > ?"
+        sql = (f"SELECT e.id, {', '.join('e.' + c for c in ESTIMATE_COLUMNS[1:])}, "
+               "l.id, l.product, l.quantity, l.unit_price, l.total_value "
+               f"FROM estimates e JOIN estimate_lines l ON l.estimate_id = e.id{where} "
+               "ORDER BY l.id LIMIT ?")
+        last_line_id = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(sql, params + [last_line_id, chunk_size]).fetchall()
+            if not rows:
+                return
+            chunk = pd.DataFrame.from_records(rows, columns=LINE_EXPORT_COLUMNS)
+            last_line_id = int(chunk["line_id"].iloc[-1])
+            yield chunk.drop(columns="line_id")
+
+    def distinct(self, column):
+        """Distinct values of ``destination``, ``status`` or ``product`` for filter widgets."""
+        table = {"destination": "estimates", "status": "estimates", "product": "estimate_lines"}[column]
+        with self._lock:
+            # Cached until an update, delete or append; the key costs two primary-key lookups
+            key = (self.mutations,) + self._conn.execute(
+                "SELECT (SELECT MAX(id) FROM estimates), (SELECT MAX(id) FROM estimate_lines)").fetchone()
+            cached = self._distinct.get(column)
+            if cached is None or cached[0] != key:
+                values = [r[0] for r in self._conn.execute(f"SELECT DISTINCT {column} FROM {table} ORDER BY {column}")]
+                cached = self._distinct[column] = (key, values)
+            return list(cached[1])
+
+    def _lines_for(self, ids):
+        lines = {}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            for est_id, product, qty, price, total in self._conn.execute(
+                    "SELECT estimate_id, product, quantity, unit_price, total_value FROM estimate_lines "
+                    f"WHERE estimate_id IN ({', '.join('?' * len(chunk))}) ORDER BY id", chunk):
+                lines.setdefault(est_id, {})[product] = {"quantity": qty, "unit_price": price, "total_value": total}
+        return lines
+
+
+def _chunks(cursor, size=CHUNK_ROWS):
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield rows
+
+
+def _lines_frame(chunks):
+    # Text columns become categoricals built from per-chunk codes, so the
+    # full table never holds a Python string per row
+    interned = {column: {} for column in LINE_TEXT_COLUMNS}
+    parts = [_line_columns(zip(*rows), interned) for rows in chunks]
+    if not parts:
+        parts.append(_line_columns([()] * len(LINE_FRAME_COLUMNS), interned))
+    frame = {}
+    for column in LINE_FRAME_COLUMNS:
+        values = np.concatenate([part[column] for part in parts])
+        if column in interned:
+            values = pd.Categorical.from_codes(values, categories=list(interned[column]))
+        frame[column] = values
+    return pd.DataFrame(frame)
+
+
+def _line_columns(columns, interned):
+    part = {}
+    for column, values in zip(LINE_FRAME_COLUMNS, columns):
+        if column in interned:
+            codes = interned[column]
+            part[column] = np.fromiter((codes.setdefault(v, len(codes)) for v in values), np.int32, len(values))
+        elif column in ("line_id", "estimate_id"):
+            part[column] = np.array(values, dtype=np.int64)
+        elif column == "date":
+            part[column] = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce").to_numpy()
+        else:
+            part[column] = np.array(values, dtype=np.float64)
+    return part
+
+
+def _where(date_from=None, date_to=None, destination=None, product=None, status=None, container_id=None,
+           prefix=""):
+    clauses, params = [], []
+    if date_from is not None:
+        clauses.append(f"{prefix}date >= ?")
+        params.append(_iso(date_from))
+    if date_to is not None:
+        clauses.append(f"{prefix}date <= ?")
+        params.append(_iso(date_to))
+    for column, value in (("destination", destination), ("status", status)):
+        if value:
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{prefix}{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    if product:
+        values = [product] if isinstance(product, str) else list(product)
+        clauses.append(f"{prefix}id IN (SELECT estimate_id FROM estimate_lines "
+                       f"WHERE product IN ({', '.join('?' * len(values))}))")
+        params.extend(values)
+    if container_id:
+        # A plain substring search: _ and % are common in container IDs, not wildcards
+        clauses.append(f"{prefix}container_id LIKE ? ESCAPE '\\'")
+        escaped = container_id.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _iso(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()[:10]
+    return str(value)[:10]
+
+
+def _estimate_row(est_id, est):
+    costs, results = est.get("costs", {}), est.get("results", {})
+    return ((est_id, est["container_id"], est.get("destination", ""), _iso(est.get("date", datetime.date.today())),
+             est.get("status", "active"))
+            + tuple(costs.get(k) for k in COST_KEYS)
+            + tuple(results.get(k) for k in RESULT_KEYS))
+
+
+def _estimate_dict(row, products):
+    values = dict(zip(ESTIMATE_COLUMNS, row))
+    return {
+        "id": values["id"],
+        "container_id": values["container_id"],
+        "destination": values["destination"],
+        "date": datetime.date.fromisoformat(values["date"]),
+        "products": products,
+        "costs": {k: values[k] for k in COST_KEYS},
+        "results": {k: values[k] for k in RESULT_KEYS},
+        "status": values["status"],
+    }
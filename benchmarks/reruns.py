@@ -0,0 +1,187 @@
+"""Per-click rerun latency of the Streamlit app, measured through a real server.
+
+Run from the repository root, with Streamlit installed::
+
+    python -m benchmarks.reruns                              # Dashboard and Create Estimate
+    python -m benchmarks.reruns --screens Dashboard --reruns 50 -o reruns.json
+    python -m benchmarks.reruns --app /path/to/other/checkout/agro.py
+
+Starts ``streamlit run`` headless on a free port, connects over the same
+websocket protocol as the browser, logs in, opens each screen and then
+times ``--reruns`` further reruns of it: the time from sending the rerun
+request to the server reporting the script finished.  That is the latency
+of every widget click on the screen, minus browser rendering.  The first
+run of each screen is reported separately, as is the cold start: from the
+new server's first run (the login page) to the landing screen after login.
+
+``--app`` may point at another checkout, e.g. a ``git worktree`` of an older
+commit, to compare before and after a change; the server runs from that
+checkout's directory, so it imports that checkout's modules.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+
+DEFAULT_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "agro.py")
+DEFAULT_SCREENS = ("Dashboard", "Create Estimate")
+LOGIN = {"Username": "Yash", "Password": "yash123"}
+
+
+class AppClient:
+    """A minimal browser stand-in: sends rerun requests with widget values, waits for the run to finish."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.widgets = {}       # (element type, label) -> widget id, from the last run
+        self.options = {}       # radio label -> options, from the last run
+        self.values = {}        # widget id -> WidgetState sent with every rerun
+        self.errors = []
+
+    async def rerun(self, triggers=()):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        for state in self.values.values():
+            msg.rerun_script.widget_states.widgets.append(state)
+        for widget_id in triggers:
+            msg.rerun_script.widget_states.widgets.add(id=widget_id, trigger_value=True)
+        start = time.perf_counter()
+        await self.connection.write_message(msg.SerializeToString(), binary=True)
+        self.widgets, self.options, self.errors = {}, {}, []
+        while True:
+            payload = await self.connection.read_message()
+            if payload is None:
+                raise ConnectionError("The Streamlit server closed the connection")
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof("type")
+            if kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                self._record(forward.delta.new_element)
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    # st.experimental_rerun(); the next run belongs to the same click
+                    continue
+                return time.perf_counter() - start
+
+    def _record(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(f"{element.exception.type}: {element.exception.message}")
+            return
+        widget = getattr(element, kind)
+        if hasattr(widget, "id") and hasattr(widget, "label"):
+            self.widgets[(kind, widget.label)] = widget.id
+        if kind == "radio":
+            self.options[widget.label] = list(widget.options)
+
+    def widget(self, kind, label):
+        try:
+            return self.widgets[(kind, label)]
+        except KeyError:
+            raise RuntimeError(f"No {kind} labelled {label!r} in the last run") from None
+
+    def set_value(self, kind, label, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self.widget(kind, label)
+        self.values[widget_id] = WidgetState(id=widget_id, **value)
+
+
+async def measure_screens(port, screens, reruns):
+    from tornado.websocket import websocket_connect
+
+    connection = await websocket_connect(f"ws://127.0.0.1:{port}/stream", max_message_size=256 * 2**20)
+    client = AppClient(connection)
+    # Cold start: a fresh server process through the login page to the first screen (Dashboard)
+    cold_start = await client.rerun()
+    for label, value in LOGIN.items():
+        client.set_value("text_input", label, string_value=value)
+    cold_start += await client.rerun(triggers=[client.widget("button", "Login")])
+    cold_start += await client.rerun()
+    if "Navigate" not in client.options:
+        raise RuntimeError(f"Login did not reach the app: {'; '.join(client.errors) or 'no navigation menu'}")
+    results = [{"screen": "(cold start)", "first_run_s": cold_start}]
+    for screen in screens:
+        client.set_value("radio", "Navigate", int_value=client.options["Navigate"].index(screen))
+        first = await client.rerun()
+        if client.errors:
+            raise RuntimeError(f"{screen} raised: {'; '.join(client.errors)}")
+        times = [await client.rerun() for _ in range(reruns)]
+        p50, p95 = np.percentile(times, (50, 95)).tolist()
+        results.append({"screen": screen, "first_run_s": first, "reruns": len(times), "mean_s": float(np.mean(times)),
+                        "p50_s": p50, "p95_s": p95})
+    connection.close()
+    return results
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app, port, env=None):
+    # A file rather than a pipe, so a chatty server never blocks on a full pipe
+    log = tempfile.TemporaryFile()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", os.path.basename(app), "--server.headless", "true",
+         "--server.port", str(port), "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false",
+         "--global.developmentMode", "false"],
+        cwd=os.path.dirname(os.path.abspath(app)), env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            log.seek(0)
+            raise RuntimeError(f"streamlit exited: {log.read().decode(errors='replace')}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/healthz", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("streamlit did not start within 60 s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.reruns", description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=DEFAULT_APP, help="App script to serve (default: this checkout's agro.py).")
+    parser.add_argument("--screens", nargs="+", default=list(DEFAULT_SCREENS), help="Screens to measure, in order.")
+    parser.add_argument("--reruns", type=int, default=30, help="Timed reruns per screen (default: 30).")
+    parser.add_argument("--db", help="Estimate database the app should use (sets AGRO_DB_PATH).")
+    parser.add_argument("-o", "--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    # The server must import the served checkout's modules, not this one's
+    env.pop("PYTHONPATH", None)
+    if args.db:
+        env["AGRO_DB_PATH"] = os.path.abspath(args.db)
+    port = _free_port()
+    server = start_server(args.app, port, env)
+    try:
+        results = asyncio.run(measure_screens(port, args.screens, args.reruns))
+    finally:
+        server.terminate()
+        server.wait()
+    print(f"{'screen':<24}{'first run':>12}{'p50':>12}{'p95':>12}{'mean':>12}")
+    for row in results:
+        print(f"{row['screen']:<24}{row['first_run_s'] * 1000:>9.1f} ms" + "".join(
+            f"{row[key] * 1000:>9.1f} ms" for key in ("p50_s", "p95_s", "mean_s") if key in row))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"app": os.path.abspath(args.app), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Headless benchmark suite for the pricing and analytics engine.
+
+Run from the repository root::
+
+    python -m benchmarks.run                           # 1k, 100k and 1M estimates
+    python -m benchmarks.run --sizes 1k,100k -o new.json
+    python -m benchmarks.run --compare baseline.json   # exit status 1 on regressions
+
+Every benchmark works on a synthetic history (``benchmarks.synthetic``) held
+in a temporary SQLite store.  Timed runs are done first without tracing; one
+further run under ``tracemalloc`` records peak memory, so tracing overhead
+never leaks into the timings.  Results are written as JSON and can be
+compared against an earlier run to flag slowdowns and memory growth.
+"""
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from agro_engine import pricing
+from agro_engine.analytics import LineTable
+from agro_engine.batch import price_batch
+from agro_engine.forecasting import ForecastEngine
+from agro_engine.freight import MockRateProvider, RateTable
+from agro_engine.solver import buying_grid
+from agro_engine.store import EstimateStore
+
+from .synthetic import generate_tables, iter_estimate_chunks
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+GROUPS = ("pricing", "store", "dashboard", "history", "bi", "forecasting", "pdf", "solver")
+STORELESS_GROUPS = {"pricing", "solver"}
+PDF_SAMPLE = 50
+ZIP_SAMPLE = 200
+DICT_RECORDS_LIMIT = 100_000
+# Differences below these floors are noise, whatever the ratio
+TIME_FLOOR = 0.002
+MEMORY_FLOOR = 1.0
+
+
+def measure(name, size, fn, repeats, items=None, setup=None):
+    """Time ``fn`` ``repeats`` times, then once more under tracemalloc for peak memory."""
+    times = []
+    for _ in range(repeats):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    args = setup() if setup else ()
+    tracemalloc.start()
+    try:
+        fn(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return summarize(name, size, times, items or size, peak)
+
+
+def summarize(name, size, times, items, peak):
+    p50, p95, p99 = np.percentile(times, (50, 95, 99)).tolist()
+    return {
+        "name": name,
+        "size": size,
+        "repeats": len(times),
+        "mean_s": float(np.mean(times)),
+        "p50_s": p50,
+        "p95_s": p95,
+        "p99_s": p99,
+        "throughput_per_s": items / p50 if p50 else None,
+        "peak_mb": peak / 2**20 if peak is not None else None,
+    }
+
+
+# ---- benchmark groups ---------------------------------------------------
+
+def bench_pricing(size, repeats, context):
+    containers, lines = generate_tables(size, seed=1)
+    codes = lines["container_id"].map(
+        dict(zip(containers["container_id"], range(size)))).to_numpy()
+    parameters = [containers[field].to_numpy() for field in pricing.COST_FIELDS + ("duty",) + pricing.MARGIN_FIELDS]
+    quantity, unit_price = lines["quantity"].to_numpy(), lines["unit_price"].to_numpy()
+    yield measure("pricing.price_arrays", size,
+                  lambda: pricing.price_arrays(codes, quantity, unit_price, *parameters), repeats)
+    yield measure("pricing.price_batch", size, lambda: price_batch(containers, lines), repeats)
+
+
+def bench_store(size, repeats, context):
+    store = context["store"]
+    yield summarize("store.add_many", size, [context["ingest_s"]], size, None)
+    yield measure("store.open", size, lambda: EstimateStore(store.path).close(), repeats)
+    result = measure("store.estimate_table", size, lambda: store.estimate_table(), repeats)
+    result["bytes_per_estimate"] = store.estimate_table().nbytes / size
+    yield result
+    if size <= DICT_RECORDS_LIMIT:
+        # The nested-dict form for comparison; too large to hold at 1M estimates
+        yield measure("store.query_dicts", size, lambda: store.query(), repeats)
+
+
+def bench_dashboard(size, repeats, context):
+    store = context["store"]
+
+    def metrics():
+        aggregates = store.aggregates
+        return aggregates.count, aggregates.status_count("active"), aggregates.avg_margin, aggregates.total_value
+
+    yield measure("dashboard.metrics", size, metrics, max(repeats, 100), items=1)
+    yield measure("dashboard.verify", size, store._compute_aggregates, repeats)
+
+
+def bench_history(size, repeats, context):
+    store = context["store"]
+    destination = context["destinations"][:2]
+
+    def first_page():
+        store.count(destination=destination)
+        return store.estimates_frame(limit=50, order_by="date", descending=True, destination=destination)
+
+    def deep_page():
+        return store.estimates_frame(limit=50, offset=size // 2, order_by="total_value")
+
+    yield measure("history.first_page", size, first_page, repeats, items=50)
+    yield measure("history.deep_page", size, deep_page, repeats, items=50)
+
+
+def bench_bi(size, repeats, context):
+    store = context["store"]
+    yield measure("bi.load_lines", size, lambda: LineTable(store).frame(), repeats)
+    table = shared_line_table(context)
+
+    def aggregations():
+        table._cache = {}
+        return table.revenue_by_product(), table.revenue_trend(), table.margin_attribution()
+
+    yield measure("bi.aggregations", size, aggregations, repeats)
+
+
+def bench_forecasting(size, repeats, context):
+    table = shared_line_table(context)
+    yield measure("forecasting.fit_weekly", size, lambda: ForecastEngine(table, "W").refresh(), repeats)
+    engine = ForecastEngine(table, "W").refresh()
+    yield measure("forecasting.forecast", size, lambda: engine.forecast(horizon=4), repeats)
+
+
+def bench_pdf(size, repeats, context):
+    try:
+        from agro_engine.reports import _report_data, build_estimate_pdf, write_reports_zip
+    except ImportError as exc:
+        print(f"  skipping pdf: {exc}", file=sys.stderr)
+        return
+    estimates = context["store"].query(limit=ZIP_SAMPLE, order_by="date")
+    sample = [_report_data(est) for est in estimates[:PDF_SAMPLE]]
+    # Per-report latency: one sample per PDF rather than per repeat
+    times = []
+    for data in sample:
+        start = time.perf_counter()
+        build_estimate_pdf(data, "bench")
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    build_estimate_pdf(sample[0], "bench")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    result = summarize("pdf.single", size, times, 1, peak)
+    result["repeats"] = len(sample)
+    yield result
+    yield measure("pdf.bulk_zip", size, lambda: write_reports_zip(estimates, "bench", io.BytesIO()),
+                  max(1, repeats // 2), items=len(estimates))
+
+
+def bench_solver(size, repeats, context):
+    # ``size`` grid cells: targets x the three margin scenarios
+    rng = np.random.default_rng(7)
+    rate_table = RateTable(MockRateProvider().fetch())
+    destinations = [destination for _, destination in rate_table.routes()]
+    n_targets = max(size // 3, 1)
+    targets = {"product": [f"SKU {i}" for i in range(n_targets)],
+               "destination": rng.choice(destinations, n_targets),
+               "target": rng.uniform(800, 3000, n_targets)}
+    scenarios = {"scenario": ["Low", "Base", "High"], "margin": [13.0, 15.0, 17.0],
+                 "distributor_margin": [8.0, 10.0, 12.0], "retailer_margin": [18.0, 20.0, 22.0]}
+    yield measure("solver.grid_closed_form", size,
+                  lambda: buying_grid(targets, scenarios, rate_table, other_costs=500.0), repeats)
+    yield measure("solver.grid_shared_costs", size,
+                  lambda: buying_grid(targets, scenarios, rate_table, other_costs=500.0,
+                                      base_value=25_000.0, base_quantity=10.0), repeats)
+
+
+BENCHMARKS = {
+    "pricing": bench_pricing,
+    "store": bench_store,
+    "dashboard": bench_dashboard,
+    "history": bench_history,
+    "bi": bench_bi,
+    "forecasting": bench_forecasting,
+    "pdf": bench_pdf,
+    "solver": bench_solver,
+}
+
+
+# ---- driver -------------------------------------------------------------
+
+def build_context(size, workdir):
+    """Load ``size`` synthetic estimates into a fresh store."""
+    store = EstimateStore(os.path.join(workdir, f"bench_{size}.db"))
+    ingest = 0.0
+    for chunk in iter_estimate_chunks(size, seed=size):
+        start = time.perf_counter()
+        store.add_many(chunk)
+        ingest += time.perf_counter() - start
+    return {"store": store, "ingest_s": ingest, "destinations": store.distinct("destination")}
+
+
+def shared_line_table(context):
+    """A loaded ``LineTable`` shared by the BI and forecasting groups, built on first use."""
+    if "line_table" not in context:
+        context["line_table"] = LineTable(context["store"])
+        context["line_table"].frame()
+    return context["line_table"]
+
+
+def run(sizes, groups, repeats):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for label in sizes:
+            size = SIZES[label]
+            needs_store = any(group not in STORELESS_GROUPS for group in groups)
+            print(f"[{label}] preparing {size:,} estimates", file=sys.stderr)
+            context = build_context(size, workdir) if needs_store else {}
+            # The largest history needs fewer repeats to finish in reasonable time
+            size_repeats = max(1, repeats // 2) if size >= 1_000_000 else repeats
+            for group in groups:
+                for result in BENCHMARKS[group](size, size_repeats, context):
+                    results.append(result)
+                    print(format_result(result), file=sys.stderr)
+            if needs_store:
+                context["store"].close()
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import pandas
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pandas.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def format_result(result):
+    peak = f"{result['peak_mb']:9.1f} MB" if result["peak_mb"] is not None else "          -"
+    throughput = f"{result['throughput_per_s']:14,.0f}/s" if result["throughput_per_s"] else ""
+    line = (f"  {result['name']:<24} {result['size']:>9,}  p50 {result['p50_s'] * 1000:10.2f} ms  "
+            f"p95 {result['p95_s'] * 1000:10.2f} ms  {peak}  {throughput}")
+    if "bytes_per_estimate" in result:
+        line += f"  {result['bytes_per_estimate']:,.0f} B/estimate"
+    return line
+
+
+def compare(baseline, current, threshold):
+    """Return regression messages for benchmarks slower or hungrier than ``baseline`` by over ``threshold``."""
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = previous.get((result["name"], result["size"]))
+        if old is None:
+            continue
+        label = f"{result['name']} @ {result['size']:,}"
+        if (result["p50_s"] > old["p50_s"] * (1 + threshold)
+                and result["p50_s"] - old["p50_s"] > TIME_FLOOR):
+            regressions.append(f"{label}: p50 {old['p50_s'] * 1000:.2f} ms -> {result['p50_s'] * 1000:.2f} ms "
+                               f"({result['p50_s'] / old['p50_s']:.2f}x)")
+        if (old["peak_mb"] is not None and result["peak_mb"] is not None
+                and result["peak_mb"] > old["peak_mb"] * (1 + threshold)
+                and result["peak_mb"] - old["peak_mb"] > MEMORY_FLOOR):
+            regressions.append(f"{label}: peak memory {old['peak_mb']:.1f} MB -> {result['peak_mb']:.1f} MB")
+    return regressions
+
+
+def parse_list(value, allowed):
+    items = [item.strip().lower() for item in value.split(",") if item.strip()]
+    unknown = [item for item in items if item not in allowed]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown value(s) {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=lambda v: parse_list(v, SIZES), default=list(SIZES),
+                        help="Comma separated history sizes (default: 1k,100k,1m).")
+    parser.add_argument("--only", type=lambda v: parse_list(v, GROUPS), default=list(GROUPS),
+                        help=f"Comma separated benchmark groups (default: {','.join(GROUPS)}).")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per benchmark (default: 5).")
+    parser.add_argument("-o", "--output", help="Write results to this JSON file "
+                                               "(default: benchmarks/results/<timestamp>.json).")
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against this results file.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative slowdown or memory growth counted as a regression (default: 0.2).")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(), "results": run(args.sizes, args.only, args.repeats)}
+    output = args.output or os.path.join(os.path.dirname(__file__), "results",
+                                         f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
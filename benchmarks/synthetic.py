@@ -0,0 +1,59 @@
+"""Synthetic estimate history for benchmarks.
+
+Records have the same shape as the estimates the app stores (container,
+destination, date, ``products``, ``costs``, ``results``, status) and are
+priced with the real pricing chain, so downstream aggregates are
+realistic.  Large histories are produced in chunks to keep memory bounded.
+"""
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from agro_engine.batch import estimate_records, price_batch
+
+PRODUCTS = ["Basmati Rice", "Finger Millet", "Red Lentils", "Sunflower Oil", "Black Gram",
+            "Chickpeas", "Sorghum", "Pearl Millet", "Green Gram", "Mustard Oil"]
+DESTINATIONS = ["United States", "United Arab Emirates", "Saudi Arabia", "United Kingdom", "India", "China", "Japan"]
+START_DATE = datetime.date(2022, 1, 1)
+DAYS = 3 * 365
+
+
+def generate_tables(n, seed=0, offset=0):
+    """``(containers, lines)`` DataFrames for ``n`` containers with 1-4 product lines each."""
+    rng = np.random.default_rng(seed)
+    ids = np.char.add("CONT-", np.arange(offset, offset + n).astype(str))
+    containers = pd.DataFrame({
+        "container_id": ids,
+        "destination": rng.choice(DESTINATIONS, n),
+        "date": pd.to_datetime(START_DATE) + pd.to_timedelta(rng.integers(0, DAYS, n), unit="D"),
+        "transport": rng.uniform(800, 4000, n).round(2),
+        "packing": rng.uniform(50, 300, n).round(2),
+        "fumigation": rng.uniform(20, 150, n).round(2),
+        "customs": rng.uniform(100, 600, n).round(2),
+        "duty": rng.choice([0.0, 2.5, 5.0, 7.5], n),
+        "margin": rng.normal(15, 2, n).round(1),
+        "distributor_margin": rng.normal(10, 1.5, n).round(1),
+        "retailer_margin": rng.normal(20, 3, n).round(1),
+    })
+    containers["date"] = containers["date"].dt.date
+    per_container = rng.integers(1, 5, n)
+    owner = np.repeat(np.arange(n), per_container)
+    # Distinct products within a container: offset a random start by the line's position
+    position = np.arange(owner.shape[0]) - np.repeat(np.cumsum(per_container) - per_container, per_container)
+    product = (rng.integers(0, len(PRODUCTS), n)[owner] + position) % len(PRODUCTS)
+    lines = pd.DataFrame({
+        "container_id": ids[owner],
+        "product": np.asarray(PRODUCTS, dtype=object)[product],
+        "quantity": rng.uniform(1, 25, owner.shape[0]).round(2),
+        "unit_price": rng.uniform(300, 1500, owner.shape[0]).round(2),
+    })
+    return containers, lines
+
+
+def iter_estimate_chunks(n, seed=0, chunk_size=50_000):
+    """Yield lists of priced estimate records, ``chunk_size`` at a time, ``n`` in total."""
+    for chunk, start in enumerate(range(0, n, chunk_size)):
+        containers, lines = generate_tables(min(chunk_size, n - start), seed=seed + chunk, offset=start)
+        priced = price_batch(containers, lines)
+        yield estimate_records(priced, lines, status="active")
@@ -0,0 +1,6 @@
+"""Streamlit screens, one module per sidebar entry, imported on first visit.
+
+Each module exposes ``render()``.  Heavy libraries (Plotly, the PDF stack)
+are imported by the screens that use them, so a session that never opens a
+chart pays nothing for them.
+"""
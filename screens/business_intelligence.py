@@ -0,0 +1,31 @@
+"""Business Intelligence: charts over the cached line table."""
+import plotly.express as px
+import streamlit as st
+
+from agro_engine.metrics import REGISTRY
+
+from .common import get_line_table
+
+
+def render():
+    st.header("Business Intelligence")
+    st.markdown("Explore advanced analytics and dashboards here.")
+    line_table = get_line_table()
+    if not line_table.frame().empty:
+        # Revenue Trend Chart
+        with REGISTRY.time("agro_chart_build_seconds", chart="revenue_trend"):
+            fig_trend = px.line(line_table.revenue_trend(), x="Date", y="Retail Price",
+                                title="Revenue Trend Over Time")
+        st.plotly_chart(fig_trend, use_container_width=True)
+        # Product Performance Analysis: Total revenue per product
+        with REGISTRY.time("agro_chart_build_seconds", chart="revenue_by_product"):
+            fig_bar = px.bar(line_table.revenue_by_product(), x="Product", y="Total Revenue",
+                             title="Total Revenue by Product", labels={"Total Revenue": "Revenue ($)"})
+        st.plotly_chart(fig_bar, use_container_width=True)
+        # Margin Distribution (Pie chart), margin dollars weighted by line value
+        with REGISTRY.time("agro_chart_build_seconds", chart="margin_attribution"):
+            fig_pie = px.pie(line_table.margin_attribution(), names="Product", values="Margin Contribution",
+                             title="Margin Distribution by Product")
+        st.plotly_chart(fig_pie, use_container_width=True)
+    else:
+        st.info("No data available for business intelligence analytics yet.")
@@ -0,0 +1,77 @@
+"""Buying Grid: the highest unit price to pay per product and destination for a target retail price or margin."""
+import pandas as pd
+import streamlit as st
+
+from agro_engine.metrics import REGISTRY
+from agro_engine.pricing import DEFAULTS, MARGIN_FIELDS
+from agro_engine.solver import buying_grid
+
+from .common import COUNTRIES, get_freight_rates, get_product_catalog
+
+TARGET_KINDS = {"Retail price per unit ($)": "retail_price", "Total margin (%)": "margin"}
+
+
+def render():
+    st.header("Buying Grid")
+    st.markdown("The most you can pay per unit for each product in each destination and still reach a target "
+                "retail price or margin, under low, base and high margin scenarios. Transport comes from the "
+                "current freight rates.")
+    index = get_product_catalog().index()
+    col1, col2 = st.columns(2)
+    with col1:
+        category = st.selectbox("Category", ["All"] + index.categories, key="grid_category")
+        names = index.search("", None if category == "All" else category, limit=len(index))
+        products = st.multiselect("Products", names, default=names[:10], key="grid_products")
+    with col2:
+        destinations = st.multiselect("Destinations", COUNTRIES, default=COUNTRIES, key="grid_destinations")
+        kind_label = st.radio("Target", list(TARGET_KINDS), key="grid_kind", horizontal=True)
+    kind = TARGET_KINDS[kind_label]
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        target = st.number_input(kind_label, min_value=0.0, value=1500.0 if kind == "retail_price" else 60.0,
+                                 key=f"grid_target_{kind}")
+    with col2:
+        quantity = st.number_input("Units per container", min_value=0.01, value=20.0, key="grid_quantity")
+    with col3:
+        other_costs = st.number_input("Packing + fumigation + customs ($)", min_value=0.0, key="grid_other_costs")
+    with col4:
+        duty = st.number_input("Duty (%)", min_value=0.0, value=DEFAULTS["duty"], key="grid_duty")
+    spread = st.slider("Margin scenario spread (± points on each margin)", 0.0, 10.0, 2.0, key="grid_spread")
+    shared = st.checkbox("Add to a part-loaded container (fixed costs shared by value)", key="grid_shared")
+    base_value = base_quantity = 0.0
+    if shared:
+        col1, col2 = st.columns(2)
+        with col1:
+            base_value = st.number_input("Value already loaded ($)", min_value=0.0, key="grid_base_value")
+        with col2:
+            base_quantity = st.number_input("Units already loaded", min_value=0.0, key="grid_base_quantity")
+    target_file = st.file_uploader("Optional per-cell targets (CSV with product, destination, target)",
+                                   type=["csv"], key="grid_targets_file")
+
+    if target_file is not None:
+        targets = pd.read_csv(target_file, dtype={"product": str, "destination": str})
+        missing = {"product", "destination", "target"} - set(targets.columns)
+        if missing:
+            st.error(f"Target file is missing columns: {', '.join(sorted(missing))}")
+            return
+    elif products and destinations:
+        targets = (pd.MultiIndex.from_product([products, destinations], names=["product", "destination"])
+                   .to_frame(index=False).assign(target=target))
+    else:
+        st.info("Select at least one product and destination.")
+        return
+    scenarios = pd.DataFrame({"scenario": ["Low", "Base", "High"]})
+    for field in MARGIN_FIELDS:
+        scenarios[field] = [max(DEFAULTS[field] - spread, 0.0), DEFAULTS[field], DEFAULTS[field] + spread]
+
+    with REGISTRY.time("agro_chart_build_seconds", chart="buying_grid"):
+        grid = buying_grid(targets, scenarios, get_freight_rates().table(), kind=kind, quantity=quantity,
+                           other_costs=other_costs, duty=duty, base_value=base_value, base_quantity=base_quantity)
+    scenario = st.radio("Scenario", scenarios["scenario"].tolist(), index=1, key="grid_scenario", horizontal=True)
+    view = grid[grid["scenario"] == scenario]
+    st.dataframe(view.pivot_table(index="product", columns="destination", values="max_unit_price",
+                                  aggfunc="first", dropna=False).round(2), use_container_width=True)
+    st.caption(f"{len(grid):,} cells solved. Blank cells cannot reach the target at any positive price or have no "
+               "freight rate; 'inf' means every price meets the margin target.")
+    st.download_button("📥 Download Grid (CSV)", data=grid.to_csv(index=False), file_name="buying_grid.csv",
+                       mime="text/csv")
@@ -0,0 +1,107 @@
+"""Process-wide resources and helpers shared by the screens."""
+import os
+import pickle
+import sys
+
+import streamlit as st
+
+from agro_engine.metrics import REGISTRY
+
+COUNTRIES = [
+    "United States", "United Arab Emirates", "Saudi Arabia",
+    "United Kingdom", "India", "China", "Japan"
+]
+
+
+@st.experimental_singleton
+def get_estimate_store():
+    # One SQLite-backed store per process, shared by every session
+    from agro_engine.store import EstimateStore
+    store = EstimateStore()
+    REGISTRY.add_collector(lambda registry: registry.set("agro_estimates", store.aggregates.count))
+    return store
+
+
+@st.experimental_singleton
+def get_product_catalog():
+    # Shared catalog; its search index is rebuilt only after an edit
+    from agro_engine.catalog import ProductCatalog
+    return ProductCatalog()
+
+
+@st.experimental_singleton
+def get_line_table():
+    # Flattened estimate-line table, extended in place as estimates are added
+    from agro_engine.analytics import LineTable
+    return LineTable(get_estimate_store())
+
+
+@st.experimental_singleton
+def get_forecast_engine(freq):
+    # One engine per bucket size; refreshed incrementally as estimates arrive
+    from agro_engine.forecasting import ForecastEngine
+    return ForecastEngine(get_line_table(), freq=freq)
+
+
+@st.experimental_singleton
+def get_freight_rates():
+    # Route rates with a 15 minute TTL, refreshed in the background
+    from agro_engine.freight import FreightRates, default_provider
+    return FreightRates(default_provider())
+
+
+@st.experimental_singleton
+def get_report_cache():
+    # Rendered PDFs keyed by a hash of their content, shared across sessions
+    from agro_engine.reports import ReportCache
+    return ReportCache()
+
+
+@st.experimental_singleton
+def start_metrics_export():
+    # Opt-in Prometheus export: AGRO_METRICS_FILE for a textfile collector, AGRO_METRICS_PORT for /metrics
+    from agro_engine.metrics import start_http_server, start_textfile_writer
+    exporters = {}
+    if os.environ.get("AGRO_METRICS_FILE"):
+        exporters["file"] = start_textfile_writer(os.environ["AGRO_METRICS_FILE"])
+    if os.environ.get("AGRO_METRICS_PORT"):
+        exporters["http"] = start_http_server(int(os.environ["AGRO_METRICS_PORT"]))
+    return exporters
+
+
+SESSION_STATE_SAMPLE_EVERY = 10
+
+
+def session_state_bytes():
+    """Approximate size of this session's state.
+
+    Buffers (bytes, uploaded files) and arrays count their raw size without
+    being copied; only the remaining values are pickled.
+    """
+    return sum(_value_bytes(value) for value in st.session_state.to_dict().values())
+
+
+def _value_bytes(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return memoryview(value).nbytes
+    if hasattr(value, "getbuffer"):
+        # BytesIO, which keyed file_uploader values (UploadedFile) are
+        with value.getbuffer() as view:
+            return view.nbytes
+    if isinstance(value, (list, tuple)) and value and all(hasattr(item, "getbuffer") for item in value):
+        return sum(_value_bytes(item) for item in value)
+    if isinstance(getattr(value, "nbytes", None), int):
+        return value.nbytes
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def metric_card(title, value, icon=""):
+    st.markdown(f"""
+    <div class="metric-card">
+        <div class="metric-title">{icon} {title}</div>
+        <div class="metric-value">{value}</div>
+    </div>
+    """, unsafe_allow_html=True)
@@ -0,0 +1,231 @@
+"""Create Estimate: the single-container form, scenario analysis and bulk upload."""
+import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from agro_engine.pricing import price_container
+from agro_engine.scenarios import (INPUTS as SCENARIO_INPUTS, INPUT_LABELS, DEFAULT_SPREAD, base_inputs,
+                                   evaluate, simulate, tornado, sweep)
+
+from agro_engine.metrics import REGISTRY
+
+from .common import COUNTRIES, get_estimate_store, get_freight_rates, get_product_catalog
+
+
+def render():
+    st.header("Container Information")
+    store = get_estimate_store()
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        container_id = st.text_input("**Container ID**", f"CONT-{datetime.datetime.now().year}-{store.count()+1:03d}")
+    with col2:
+        destination_country = st.selectbox("**Destination Country**", COUNTRIES)
+    with col3:
+        estimate_date = st.date_input("**Estimate Date**", datetime.date.today())
+    st.subheader("Product Selection")
+    products_selected = _product_lines()
+    st.subheader("Costs")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        freight_rate = get_freight_rates().table().rate(destination_country, estimate_date)
+        auto_transport = st.checkbox("Transport from freight rates", value=freight_rate is not None,
+                                     disabled=freight_rate is None)
+        if auto_transport and freight_rate is not None:
+            total_quantity = sum(p["quantity"] for p in products_selected.values())
+            transport_cost = total_quantity * freight_rate
+            st.write(f"Transport: **${transport_cost:,.2f}** ({total_quantity:,.2f} × ${freight_rate:,.2f}/unit)")
+        else:
+            transport_cost = st.number_input("Transport ($)", min_value=0.0)
+        packing_cost = st.number_input("Packing ($)", min_value=0.0)
+    with col2:
+        fumigation_cost = st.number_input("Fumigation ($)", min_value=0.0)
+        customs_cost = st.number_input("Customs ($)", min_value=0.0)
+    with col3:
+        export_duty = st.number_input("Export Duty (%)", min_value=0.0, max_value=100.0, value=5.0)
+    st.subheader("Margin & Pricing")
+    margin = st.number_input("Default Margin (%)", min_value=0.0, value=15.0)
+    distributor_margin = st.number_input("Distributor Margin (%)", min_value=0.0, value=10.0)
+    retailer_margin = st.number_input("Retailer Margin (%)", min_value=0.0, value=20.0)
+    if st.button("Calculate Estimate", key="calc_estimate", help="Calculate the final pricing based on inputs"):
+        results = price_container(products_selected, transport_cost, packing_cost, fumigation_cost, customs_cost,
+                                  export_duty, margin, distributor_margin, retailer_margin)
+        retail_price = results["retail_price"]
+        store.add({
+            "container_id": container_id,
+            "destination": destination_country,
+            "date": estimate_date,
+            "products": products_selected,
+            "costs": {
+                "transport": transport_cost,
+                "packing": packing_cost,
+                "fumigation": fumigation_cost,
+                "customs": customs_cost,
+                "duty": export_duty
+            },
+            "results": results,
+            "status": "active"
+        })
+        st.success("Estimate calculated successfully!")
+        st.metric("Retail Price", f"${retail_price:,.2f}")
+        st.metric("Total Margin", f"{results['margin']:.2f}%")
+        st.session_state.calculated_data = {
+            "container_id": container_id,
+            "results": results,
+            "products": products_selected,
+            "product_value": sum(p["total_value"] for p in products_selected.values()),
+            "costs": {
+                "transport": transport_cost,
+                "packing": packing_cost,
+                "fumigation": fumigation_cost,
+                "customs": customs_cost,
+                "duty": export_duty
+            },
+            "margins": {
+                "margin": margin,
+                "distributor_margin": distributor_margin,
+                "retailer_margin": retailer_margin
+            },
+        }
+        st.session_state.show_download = True
+    calculated = st.session_state.calculated_data
+    if calculated and "margins" in calculated:
+        _scenario_analysis(calculated)
+    _bulk_upload(store)
+
+
+def _product_lines():
+    # Widgets are drawn only for the lines added to this estimate, not for the whole catalog
+    index = get_product_catalog().index()
+    col1, col2, col3, col4 = st.columns([2, 2, 3, 1])
+    with col1:
+        category = st.selectbox("Category", ["All"] + index.categories, key="picker_category")
+    with col2:
+        search = st.text_input("Search Products", key="picker_search")
+    matches = [name for name in index.search(search, None if category == "All" else category)
+               if name not in st.session_state.estimate_lines]
+    with col3:
+        picked = st.selectbox("Product", matches, key="picker_product",
+                              format_func=lambda name: f"{name} ({index.get(name)['Category']})")
+    with col4:
+        st.write("")
+        if st.button("Add Line", key="add_line", disabled=picked is None):
+            st.session_state.estimate_lines.append(picked)
+            st.experimental_rerun()
+    products_selected = {}
+    for product in st.session_state.estimate_lines:
+        unit = (index.get(product) or {}).get("Unit", "MT")
+        cols = st.columns([2, 2, 2, 2, 1])
+        with cols[0]:
+            st.write(f"**{product}**")
+        with cols[1]:
+            qty = st.number_input(f"Qty ({unit})", key=f"{product}_qty", min_value=0.0)
+        with cols[2]:
+            price = st.number_input(f"Unit Price ($/{unit})", key=f"{product}_price", min_value=0.0)
+        with cols[3]:
+            total = qty * price
+            st.write(f"**${total:,.2f}**")
+        with cols[4]:
+            if st.button("Remove", key=f"{product}_remove"):
+                st.session_state.estimate_lines.remove(product)
+                st.experimental_rerun()
+        products_selected[product] = {"quantity": qty, "unit_price": price, "total_value": total}
+    if not products_selected:
+        st.info("Search the catalog and add the products in this container.")
+    return products_selected
+
+
+def _scenario_analysis(calculated):
+    # Plotly is imported only when a chart is actually drawn, not with the form
+    with st.expander(f"Scenario Analysis - {calculated['container_id']}"):
+        scenario_base = base_inputs(calculated["product_value"], calculated["costs"], **calculated["margins"])
+        st.markdown("Spread (one standard deviation) of each input. Freight and FX are % of their base value; "
+                    "duty and margins are percentage points.")
+        spread_cols = st.columns(len(SCENARIO_INPUTS))
+        spread = {}
+        for col, name in zip(spread_cols, SCENARIO_INPUTS):
+            with col:
+                spread[name] = st.number_input(INPUT_LABELS[name], min_value=0.0, value=DEFAULT_SPREAD[name],
+                                               key=f"spread_{name}")
+        col1, col2 = st.columns(2)
+        with col1:
+            samples = st.select_slider("Samples", [10_000, 100_000, 1_000_000], value=1_000_000)
+        with col2:
+            target_margin = st.number_input("Target Margin (%)", value=float(calculated["results"]["margin"]),
+                                            key="target_margin")
+        if st.button("Run Scenarios", key="run_scenarios"):
+            import plotly.graph_objects as go
+            with REGISTRY.time("agro_chart_build_seconds", chart="scenario_histogram"):
+                summary = simulate(scenario_base, spread, n=samples, target_margin=target_margin)
+                st.metric("Probability of Missing Target Margin", f"{summary['p_below_target']:.1%}")
+                st.table(pd.DataFrame(summary["percentiles"]).rename(
+                    columns={"fob_price": "FOB Price", "retail_price": "Retail Price", "margin": "Margin (%)"},
+                    index=lambda p: f"P{p}"))
+                counts, edges = summary["margin_histogram"]
+                fig_hist = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, name="Samples"))
+                for p, value in summary["percentiles"]["margin"].items():
+                    fig_hist.add_vline(x=value, line_dash="dot", annotation_text=f"P{p}")
+                fig_hist.add_vline(x=target_margin, line_color="red", annotation_text="Target")
+                fig_hist.update_layout(title="Margin Distribution", xaxis_title="Margin (%)",
+                                       yaxis_title="Samples", template="plotly_white")
+            st.plotly_chart(fig_hist, use_container_width=True)
+            with REGISTRY.time("agro_chart_build_seconds", chart="tornado"):
+                rows = tornado(scenario_base, spread)
+                base_margin = float(evaluate(scenario_base)["margin"])
+                fig_tornado = go.Figure()
+                labels = [INPUT_LABELS[r[0]] for r in rows]
+                fig_tornado.add_trace(go.Bar(y=labels, x=[r[1] - base_margin for r in rows],
+                                             base=base_margin, orientation="h", name="Low (P10)"))
+                fig_tornado.add_trace(go.Bar(y=labels, x=[r[2] - base_margin for r in rows],
+                                             base=base_margin, orientation="h", name="High (P90)"))
+                fig_tornado.update_layout(title="Margin Sensitivity", barmode="overlay", xaxis_title="Margin (%)",
+                                          yaxis=dict(autorange="reversed"), template="plotly_white")
+            st.plotly_chart(fig_tornado, use_container_width=True)
+        if not st.checkbox("Two-way sweep", key="show_sweep"):
+            return
+        import plotly.graph_objects as go
+        col1, col2 = st.columns(2)
+        with col1:
+            sweep_x = st.selectbox("X input", SCENARIO_INPUTS, format_func=INPUT_LABELS.get, key="sweep_x")
+        with col2:
+            sweep_y = st.selectbox("Y input", SCENARIO_INPUTS, index=3, format_func=INPUT_LABELS.get, key="sweep_y")
+        if sweep_x != sweep_y:
+            def sweep_range(name):
+                sd = spread[name] * (scenario_base[name] / 100 if name in ("freight", "fx") else 1.0) or 1.0
+                return np.maximum(np.linspace(scenario_base[name] - 3 * sd, scenario_base[name] + 3 * sd, 41), 0.0)
+            with REGISTRY.time("agro_chart_build_seconds", chart="sweep_heatmap"):
+                x_values, y_values = sweep_range(sweep_x), sweep_range(sweep_y)
+                fig_grid = go.Figure(go.Heatmap(x=x_values, y=y_values,
+                                                z=sweep(scenario_base, sweep_x, x_values, sweep_y, y_values),
+                                                colorbar=dict(title="Margin (%)")))
+                fig_grid.update_layout(xaxis_title=INPUT_LABELS[sweep_x], yaxis_title=INPUT_LABELS[sweep_y],
+                                       template="plotly_white")
+            st.plotly_chart(fig_grid, use_container_width=True)
+
+
+def _bulk_upload(store):
+    st.subheader("Bulk Container Upload")
+    st.markdown("Upload a CSV or Excel file with one row per product line. Required columns: "
+                "`container_id`, `product`, `quantity`, `unit_price`. Optional per-container columns: "
+                "`destination`, `date`, `transport`, `packing`, `fumigation`, `customs`, `duty`, "
+                "`margin`, `distributor_margin`, `retailer_margin` (missing ones use the defaults above; "
+                "a missing `transport` is filled from the freight rate for the destination and date).")
+    batch_file = st.file_uploader("Batch File", type=["csv", "xlsx"])
+    if batch_file is not None and st.button("Price Batch", key="price_batch"):
+        from agro_engine.batch import estimate_records, price_batch, read_batch_file
+        try:
+            batch_containers, batch_lines = read_batch_file(batch_file, rate_table=get_freight_rates().table())
+            priced = price_batch(batch_containers, batch_lines)
+        except ValueError as exc:
+            st.error(f"Could not price batch: {exc}")
+        else:
+            store.add_many(estimate_records(priced, batch_lines))
+            st.success(f"Priced {len(priced):,} containers successfully!")
+            st.dataframe(priced.head(1000))
+            st.download_button(
+                "📥 Download Batch Results (CSV)",
+                data=priced.to_csv(index=False),
+                file_name="batch_estimates.csv",
+                mime="text/csv"
+            )
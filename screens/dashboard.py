@@ -0,0 +1,21 @@
+"""Dashboard: headline figures read from the store's running aggregates."""
+import streamlit as st
+
+from .common import get_estimate_store, metric_card
+
+
+def render():
+    st.markdown('<h1 class="header-title">🌾 Agro Grain Export Calculator and Estimetor</h1>', unsafe_allow_html=True)
+    st.markdown("<h4 style='text-align: center;'>Export Pricing Dashboard</h4>", unsafe_allow_html=True)
+    store = get_estimate_store()
+    aggregates = store.aggregates
+    metric_card("Total Estimates", aggregates.count, "📊")
+    metric_card("Active Containers", aggregates.status_count("active"), "🚢")
+    metric_card("Avg. Margin", f"{aggregates.avg_margin:.1f}%", "💰")
+    metric_card("Total Value", f"${aggregates.total_value/1_000_000:.1f}M", "💲")
+    if st.session_state.role == "admin" and st.button("Verify Dashboard Totals"):
+        differences = store.verify_aggregates()
+        if differences:
+            st.warning("Dashboard totals were out of date and have been rebuilt:\n\n" + "\n".join(f"- {d}" for d in differences))
+        else:
+            st.success("Dashboard totals match the stored estimates.")
@@ -0,0 +1,65 @@
+"""Diagnostics (admin only): in-process performance metrics and opt-in profiling."""
+import pandas as pd
+import streamlit as st
+
+from agro_engine.metrics import REGISTRY
+
+from .common import session_state_bytes, start_metrics_export
+
+TIMERS = {
+    "agro_screen_render_seconds": ("Screen Render Times", "screen"),
+    "agro_chart_build_seconds": ("Chart Build Times", "chart"),
+    "agro_pdf_build_seconds": ("PDF Build Times", "kind"),
+    "agro_api_request_seconds": ("Quote API Requests", "path"),
+}
+
+
+def render():
+    st.header("Diagnostics")
+    samples = REGISTRY.samples()
+    values = {row["name"]: row.get("value", 0) for row in samples if row["kind"] != "histogram"}
+    reruns, sessions = values.get("agro_reruns_total", 0), values.get("agro_sessions_total", 0)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Reruns (this session)", st.session_state.rerun_count)
+    col2.metric("Reruns per Session", f"{reruns / sessions:.1f}" if sessions else "-")
+    col3.metric("Session State", f"{len(st.session_state)} keys / {session_state_bytes() / 1024:,.1f} KB")
+    col4.metric("Stored Estimates", f"{values.get('agro_estimates', 0):,}")
+
+    for name, (title, label) in TIMERS.items():
+        rows = [row for row in samples if row["name"] == name]
+        if not rows:
+            continue
+        st.subheader(title)
+        st.dataframe(pd.DataFrame({
+            label.title(): [row["labels"].get(label, "") for row in rows],
+            "Count": [row["count"] for row in rows],
+            "Mean (ms)": [row["mean"] * 1000 for row in rows],
+            "Max (ms)": [row["max"] * 1000 for row in rows],
+            "Total (s)": [row["sum"] for row in rows],
+        }).sort_values("Total (s)", ascending=False).round(2), use_container_width=True)
+    state_sizes = next((row for row in samples if row["name"] == "agro_session_state_bytes"), None)
+    if state_sizes:
+        st.caption(f"Session state over {state_sizes['count']:,} sampled reruns: mean "
+                   f"{state_sizes['mean'] / 1024:,.1f} KB, largest {state_sizes['max'] / 1024:,.1f} KB.")
+
+    st.subheader("Profiling")
+    st.markdown("Profile the next rerun of whichever screen you open next with cProfile.")
+    if st.button("Profile Next Rerun", key="profile_next"):
+        st.session_state.profile_next_rerun = True
+        st.info("Profiling armed: open the slow screen, then come back here for the report.")
+    if st.session_state.get("last_profile"):
+        with st.expander(f"Last profile - {st.session_state.last_profile_screen}"):
+            st.code(st.session_state.last_profile)
+
+    st.subheader("Prometheus Export")
+    exporters = start_metrics_export()
+    if exporters:
+        st.markdown("Exporting via " + ", ".join(sorted(exporters)) + ".")
+    else:
+        st.markdown("Set `AGRO_METRICS_FILE` (textfile collector) or `AGRO_METRICS_PORT` (`/metrics` endpoint) "
+                    "to export continuously.")
+    metrics_text = REGISTRY.prometheus_text()
+    st.download_button("📥 Download Metrics", data=metrics_text, file_name="agro_metrics.prom", mime="text/plain")
+    with st.expander("Metrics text"):
+        st.code(metrics_text)
@@ -0,0 +1,60 @@
+"""Forecasting (admin only): per product x destination price forecasts."""
+import plotly.graph_objects as go
+import streamlit as st
+
+from agro_engine.forecasting import FREQUENCIES
+from agro_engine.metrics import REGISTRY
+
+from .common import get_estimate_store, get_forecast_engine
+
+
+def render():
+    st.header("Forecasting")
+    st.markdown("Retail price per unit for every product and destination, forecast with Holt's exponential "
+                "smoothing over regular time buckets.")
+    if get_estimate_store().aggregates.count:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            frequency = st.selectbox("Bucket", list(FREQUENCIES), key="forecast_frequency")
+        with col2:
+            horizon = st.slider("Horizon (buckets)", min_value=1, max_value=24, value=8, key="forecast_horizon")
+        with col3:
+            interval = st.selectbox("Interval", [0.8, 0.9, 0.95], index=2, format_func="{:.0%}".format,
+                                    key="forecast_interval")
+        engine = get_forecast_engine(FREQUENCIES[frequency]).refresh()
+        # One read: another session's refresh may replace the series index meanwhile
+        series = engine.series
+        if len(series):
+            col1, col2 = st.columns(2)
+            with col1:
+                forecast_product = st.selectbox("Product", sorted(series.get_level_values(0).unique()),
+                                                key="forecast_product")
+            with col2:
+                forecast_destination = st.selectbox(
+                    "Destination", sorted(series[series.get_level_values(0) == forecast_product]
+                                          .get_level_values(1).unique()),
+                    key="forecast_destination")
+            with REGISTRY.time("agro_chart_build_seconds", chart="forecast"):
+                history = engine.history(forecast_product, forecast_destination)
+                forecast = engine.forecast(horizon, interval, series=[(forecast_product, forecast_destination)])
+                st.metric("Next Bucket Forecast ($/unit)", f"${forecast['forecast'].iloc[0]:,.2f}")
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(x=history["period"], y=history["value"], mode='markers', name='Observed'))
+                fig.add_trace(go.Scatter(x=history["period"], y=history["level"], mode='lines', name='Smoothed'))
+                fig.add_trace(go.Scatter(x=forecast["period"], y=forecast["upper"], mode='lines',
+                                         line=dict(width=0), showlegend=False))
+                fig.add_trace(go.Scatter(x=forecast["period"], y=forecast["lower"], mode='lines', line=dict(width=0),
+                                         fill='tonexty', fillcolor='rgba(39, 174, 96, 0.2)',
+                                         name=f"{interval:.0%} interval"))
+                fig.add_trace(go.Scatter(x=forecast["period"], y=forecast["forecast"], mode='lines+markers',
+                                         name='Forecast'))
+                fig.update_layout(title=f"{forecast_product} to {forecast_destination}",
+                                  xaxis_title="Date", yaxis_title="Retail Price ($/unit)",
+                                  template="plotly_white")
+            st.plotly_chart(fig, use_container_width=True)
+            with st.expander("Next-bucket forecast for every series"):
+                st.dataframe(engine.forecast(1, interval).drop(columns="step"), use_container_width=True)
+        else:
+            st.info("Not enough data for forecasting yet.")
+    else:
+        st.info("Not enough data for forecasting yet.")
@@ -0,0 +1,29 @@
+"""Current Freight Prices: the live rate table and per-route history."""
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from .common import get_freight_rates
+
+
+def render():
+    st.header("Current Freight Prices")
+    freight_rates = get_freight_rates()
+    rate_table = freight_rates.table()
+    st.markdown(f"Source: {freight_rates.provider.name} | Refreshed: "
+                f"{datetime.datetime.fromtimestamp(freight_rates.loaded_at):%Y-%m-%d %H:%M}")
+    if freight_rates.last_error is not None:
+        st.warning(f"Last refresh failed, showing previous rates: {freight_rates.last_error}")
+    current_rates = rate_table.current()
+    df_freight = pd.DataFrame({
+        "Route": current_rates["origin"] + "-" + current_rates["destination"],
+        "Freight Cost ($/MT)": current_rates["rate"],
+        "Last Updated": current_rates["effective_date"].dt.date
+    })
+    st.table(df_freight)
+    route = st.selectbox("Rate history for", current_rates["destination"].tolist())
+    st.line_chart(rate_table.history(route).set_index("effective_date")["rate"])
+    if st.session_state.role == "admin" and st.button("Refresh Now"):
+        freight_rates.refresh()
+        st.experimental_rerun()
@@ -0,0 +1,204 @@
+"""Estimates History: filtered, sorted pages fetched from the store."""
+import contextlib
+import datetime
+import os
+import tempfile
+import time
+
+import pandas as pd
+import streamlit as st
+
+from agro_engine.history_io import export_history, import_history
+from agro_engine.pricing import reprice_estimate
+from agro_engine.reports import write_reports_zip
+
+from .common import get_estimate_store, get_freight_rates
+
+SORT_COLUMNS = ["date", "container_id", "destination", "status", "retail_price", "margin"]
+HISTORY_FORMATS = {"CSV": ("csv", "text/csv"), "Parquet": ("parquet", "application/octet-stream"),
+                   "Arrow": ("arrow", "application/vnd.apache.arrow.file")}
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "agro_history_exports")
+EXPORT_TTL = 24 * 60 * 60
+# Larger exports are not pushed through the browser download (it buffers the whole file)
+MAX_DOWNLOAD_BYTES = 256 * 1024 * 1024
+
+
+def render():
+    st.header("Estimates History")
+    store = get_estimate_store()
+    if store.aggregates.count:
+        # Filters, sorting and paging all run in the store; only the visible page is fetched
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            search = st.text_input("Container ID contains", key="history_search")
+            use_dates = st.checkbox("Filter by date", key="history_use_dates")
+        with col2:
+            destinations = st.multiselect("Destination", store.distinct("destination"), key="history_destinations")
+            date_from = st.date_input("From", datetime.date.today().replace(day=1), key="history_from",
+                                      disabled=not use_dates)
+        with col3:
+            products = st.multiselect("Product", store.distinct("product"), key="history_products")
+            date_to = st.date_input("To", datetime.date.today(), key="history_to", disabled=not use_dates)
+        statuses = st.multiselect("Status", store.distinct("status"), key="history_statuses")
+        filters = {"container_id": search.strip(), "destination": destinations,
+                   "product": products, "status": statuses}
+        if use_dates:
+            filters.update(date_from=date_from, date_to=date_to)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_column = st.selectbox("Sort by", SORT_COLUMNS, key="history_sort")
+        with col2:
+            descending = st.radio("Order", ["Descending", "Ascending"], key="history_order", horizontal=True) == "Descending"
+        with col3:
+            page_size = st.selectbox("Rows per page", [25, 50, 100], key="history_page_size")
+        matches = store.count(**filters)
+        if matches:
+            page_count = (matches - 1) // page_size + 1
+            page = st.number_input(f"Page (of {page_count:,})", min_value=1, max_value=page_count, value=1,
+                                   key="history_page")
+            page_df = store.estimates_frame(
+                columns=("id", "container_id", "destination", "date", "status", "fob_price", "retail_price", "margin"),
+                limit=page_size, offset=(page - 1) * page_size, order_by=sort_column, descending=descending, **filters)
+            page_df["date"] = page_df["date"].dt.date
+            st.caption(f"Showing {len(page_df):,} of {matches:,} matching estimates")
+            st.dataframe(page_df.set_index("id"), use_container_width=True)
+            detail_id = st.selectbox("Show details for", page_df["id"].tolist(),
+                                     format_func=dict(zip(page_df["id"], page_df["container_id"])).get,
+                                     key="history_detail")
+            est = store.get(detail_id)
+            if est is not None:
+                with st.expander(f"Container ID: {est['container_id']}", expanded=True):
+                    st.write(f"Destination: {est['destination']} | Date: {est['date']} | Status: {est['status']}")
+                    st.write("**Products:**")
+                    st.table(pd.DataFrame.from_dict(est["products"], orient="index"))
+                    st.write("**Results:**")
+                    st.write(est["results"])
+                    repriced = reprice_estimate(est, get_freight_rates().table())
+                    if repriced is not None:
+                        repriced_transport, repriced_results = repriced
+                        st.write(f"**At freight rates in effect on {est['date']}:** transport "
+                                 f"${repriced_transport:,.2f}, retail price ${repriced_results['retail_price']:,.2f} "
+                                 f"({repriced_results['margin']:.2f}% margin)")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if est["status"] == "active" and st.button("Mark Closed", key=f"close_{est['id']}"):
+                            store.set_status(est["id"], "closed")
+                            st.experimental_rerun()
+                    with col2:
+                        if st.button("Delete", key=f"delete_{est['id']}"):
+                            store.delete(est["id"])
+                            st.experimental_rerun()
+            st.subheader("Bulk PDF Export")
+            st.write(f"Render a PDF report for each of the {matches:,} estimates matching the filters above.")
+            if st.button("Build Report ZIP", key="build_bulk_zip"):
+                # Streamed to disk like the history export; the session keeps only the path
+                path = _new_export_file("bulk_zip_export", "reports_", ".zip")
+                try:
+                    with st.spinner("Rendering reports..."), open(path, "wb") as bulk_zip:
+                        write_reports_zip(store.estimate_table(order_by="date", **filters),
+                                          st.session_state.username, bulk_zip)
+                except Exception:
+                    # Don't leave a half-written ZIP in the export folder
+                    os.remove(path)
+                    raise
+                st.session_state.bulk_zip_export = (path, "estimate_reports.zip", "application/zip")
+            _show_export("bulk_zip_export", "📥 Download Reports")
+            _export_section(store, matches, filters)
+        else:
+            st.info("No estimates match the selected filters.")
+    else:
+        st.info("No estimates available yet.")
+    _import_section(store)
+
+
+def _export_section(store, matches, filters):
+    st.subheader("Export History")
+    st.write(f"Export the {matches:,} estimates matching the filters above, one row per product line.")
+    label = st.radio("Format", list(HISTORY_FORMATS), key="history_export_format", horizontal=True)
+    fmt, mime = HISTORY_FORMATS[label]
+    if st.button("Build Export", key="build_history_export"):
+        # Written chunk by chunk to disk; the session keeps only the path
+        path = _new_export_file("history_export", "history_", f".{fmt}")
+        with st.spinner("Exporting..."):
+            try:
+                export_history(store, path, fmt, **filters)
+            except ImportError as exc:
+                os.remove(path)
+                st.error(str(exc))
+            else:
+                st.session_state.history_export = (path, f"estimate_history.{fmt}", mime)
+    _show_export("history_export", "📥 Download History",
+                 "`python -m agro_engine export` writes one directly.")
+
+
+def _new_export_file(key, prefix, suffix):
+    """A fresh file in ``EXPORT_DIR`` replacing the session's previous ``key`` export."""
+    _discard_export(key)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _prune_exports()
+    handle, path = tempfile.mkstemp(prefix=prefix, suffix=suffix, dir=EXPORT_DIR)
+    os.close(handle)
+    return path
+
+
+def _show_export(key, label, hint=""):
+    export = st.session_state.get(key)
+    if export is None or not os.path.exists(export[0]):
+        return
+    path, file_name, mime = export
+    size = os.path.getsize(path)
+    kind = os.path.splitext(file_name)[1].lstrip(".").upper()
+    if size <= MAX_DOWNLOAD_BYTES:
+        with open(path, "rb") as export_file:
+            st.download_button(f"{label} ({kind}, {size / 2**20:,.1f} MB)", data=export_file, file_name=file_name,
+                               mime=mime)
+    else:
+        st.info(f"The {kind} file is {size / 2**20:,.0f} MB, too large for a browser download. It was written to "
+                f"`{path}` on the server. {hint}")
+    if st.button("Discard Export", key=f"discard_{key}"):
+        _discard_export(key)
+        st.experimental_rerun()
+
+
+def _discard_export(key):
+    export = st.session_state.get(key)
+    st.session_state[key] = None
+    if export is not None:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(export[0])
+
+
+def _prune_exports():
+    # Exports left behind by sessions that ended without discarding them
+    cutoff = time.time() - EXPORT_TTL
+    for entry in os.scandir(EXPORT_DIR):
+        with contextlib.suppress(FileNotFoundError):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+
+
+def _import_section(store):
+    st.subheader("Import History")
+    st.markdown("Upload a CSV, Parquet or Arrow file with `container_id`, `date`, `product`, `quantity` and "
+                "`unit_price` columns (plus any exported columns). Rows of one estimate must be consecutive.")
+    history_file = st.file_uploader("History file", type=["csv", "parquet", "arrow", "feather"], key="history_file")
+    skip_invalid = st.checkbox("Skip invalid estimates instead of stopping", key="history_skip_invalid")
+    if history_file is not None and st.button("Import History", key="import_history"):
+        with st.spinner("Importing..."):
+            try:
+                summary = import_history(store, history_file, skip_invalid=skip_invalid)
+            except (ImportError, ValueError, pd.errors.ParserError) as exc:
+                st.error(f"Import stopped: {exc}")
+            else:
+                st.session_state.history_import_summary = summary
+                # Both were built from the history before the import
+                _discard_export("history_export")
+                _discard_export("bulk_zip_export")
+                st.experimental_rerun()
+    summary = st.session_state.get("history_import_summary")
+    if summary:
+        st.success(f"Imported {summary['estimates']:,} estimates ({summary['lines']:,} product lines).")
+        if summary["skipped_estimates"]:
+            st.warning(f"Skipped {summary['skipped_estimates']:,} estimates with invalid rows.")
+            with st.expander("Problems"):
+                st.write("\n".join(f"- {error}" for error in summary["errors"]))
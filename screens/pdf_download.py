@@ -0,0 +1,22 @@
+"""PDF download shown under every screen once an estimate has been calculated."""
+import streamlit as st
+
+from agro_engine.reports import report_filename, report_key
+
+from .common import get_report_cache
+
+
+def render():
+    if st.session_state.show_download and st.session_state.calculated_data:
+        report_data = st.session_state.calculated_data
+        report_cache = get_report_cache()
+        report_pdf = report_cache.get(report_key(report_data, st.session_state.username))
+        if report_pdf is None and st.button("📄 Prepare PDF Report", key="prepare_report"):
+            report_pdf = report_cache.get_or_build(report_data, st.session_state.username)
+        if report_pdf is not None:
+            st.download_button(
+                "📥 Download PDF Report",
+                data=report_pdf,
+                file_name=report_filename(report_data),
+                mime="application/pdf"
+            )
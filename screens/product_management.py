@@ -0,0 +1,43 @@
+"""Product Management: the shared product catalog, the add-product form and bulk CSV import."""
+import pandas as pd
+import streamlit as st
+
+from .common import get_product_catalog
+
+
+def render():
+    st.header("Product Management")
+    st.markdown("Manage your products below. You can update details or add a new product.")
+    catalog = get_product_catalog()
+    index = catalog.index()
+    col1, col2 = st.columns(2)
+    with col1:
+        category = st.selectbox("Category", ["All"] + index.categories, key="catalog_category")
+    with col2:
+        search = st.text_input("Search", key="catalog_search")
+    names = index.search(search, None if category == "All" else category, limit=len(index))
+    # Display current products using st.dataframe (non-editable)
+    df_products = pd.DataFrame([{"Product": name, **index.get(name)} for name in names],
+                               columns=["Product", "Category", "Unit"])
+    st.dataframe(df_products, use_container_width=True)
+    st.caption(f"{len(names):,} of {len(index):,} products")
+    st.markdown("### Add a New Product")
+    with st.form("new_product_form"):
+        new_product_name = st.text_input("Product Name")
+        new_category = st.text_input("Category")
+        new_unit = st.text_input("Unit")
+        submitted = st.form_submit_button("Add Product")
+        if submitted and new_product_name and new_category and new_unit:
+            catalog.upsert(new_product_name, new_category, new_unit)
+            st.success(f"Product '{new_product_name}' added successfully!")
+            st.experimental_rerun()
+    st.markdown("### Import Products")
+    st.markdown("Upload a CSV with `product`, `category` and `unit` columns. Existing products are updated.")
+    product_file = st.file_uploader("Product CSV", type=["csv"], key="product_csv")
+    if product_file is not None and st.button("Import Products", key="import_products"):
+        try:
+            count = catalog.import_csv(product_file)
+        except (ValueError, pd.errors.ParserError) as exc:
+            st.error(f"Could not import products: {exc}")
+        else:
+            st.success(f"Imported {count:,} products.")
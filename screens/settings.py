@@ -0,0 +1,7 @@
+"""Settings."""
+import streamlit as st
+
+
+def render():
+    st.header("Settings")
+    st.markdown("Customize app preferences, including UI themes and notifications here. (Feature coming soon...)")
@@ -0,0 +1,81 @@
+"""App-wide CSS, assembled once per process and injected on every rerun."""
+
+# Replace with your preferred public image URL:
+BACKGROUND_IMAGE_URL = "https://cbeditz.com/public/cbeditz/preview/agriculture-powerpoint-presentation-background-19-11614416076abiktlbxpz.jpg"
+
+# Use a web URL for the background image
+BACKGROUND_CSS = f"""
+    <style>
+    .stApp {{
+        background-image: url("{BACKGROUND_IMAGE_URL}");
+        background-size: cover;
+        background-position: center;
+        background-repeat: no-repeat;
+        background-attachment: fixed;
+    }}
+    </style>
+"""
+
+# Enhanced custom CSS & fonts from Google Fonts
+THEME_CSS = """
+    <link href="https://fonts.googleapis.com/css2?family=Roboto:wght@400;700&display=swap" rel="stylesheet">
+    <style>
+    html, body, [class*="css"] {
+        font-family: 'Roboto', sans-serif;
+    }
+    /* Sidebar customization - force text white */
+    [data-testid="stSidebar"] {
+        background: #2c3e50;
+    }
+    [data-testid="stSidebar"] * {
+        color: #ecf0f1 !important;
+    }
+    [data-testid="stSidebar"] h2, [data-testid="stSidebar"] h3 {
+        color: #ecf0f1;
+    }
+    /* Force menu radio text white */
+    [data-testid="stSidebar"] label {
+         color: #ecf0f1 !important;
+    }
+    /* Header and card customization */
+    .header-title {
+        color: #ecf0f1;
+        text-align: center;
+        text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
+    }
+    .metric-card {
+        background: rgba(255, 255, 255, 0.95);
+        border-radius: 15px;
+        padding: 20px;
+        box-shadow: 2px 2px 10px rgba(0, 0, 0, 0.1);
+        transition: transform 0.2s;
+    }
+    .metric-card:hover {
+        transform: scale(1.02);
+    }
+    .metric-title {
+        color: #34495e;
+        font-size: 1.2rem;
+        margin-bottom: 10px;
+    }
+    .metric-value {
+        color: #27ae60;
+        font-size: 1.8rem;
+        font-weight: bold;
+    }
+    .custom-btn {
+        background-color: #27ae60;
+        color: #fff;
+        border: none;
+        border-radius: 8px;
+        padding: 10px 20px;
+        cursor: pointer;
+        transition: background-color 0.2s ease;
+    }
+    .custom-btn:hover {
+        background-color: #1e8449;
+    }
+    </style>
+"""
+
+APP_CSS = BACKGROUND_CSS + THEME_CSS
@@ -0,0 +1,9 @@
+"""User Profile."""
+import streamlit as st
+
+
+def render():
+    st.header("User Profile")
+    st.markdown(f"**Username:** {st.session_state.username}")
+    st.markdown(f"**Role:** {st.session_state.role}")
+    st.markdown("Customize your profile settings here. (Feature coming soon...)")
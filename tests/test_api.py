@@ -0,0 +1,61 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+from agro_engine.api import make_server, quote
+from agro_engine.pricing import price_container
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post(server, payload, length=None):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=5)
+    headers = {"Content-Type": "application/json"}
+    if length is not None:
+        headers["Content-Length"] = length
+    conn.request("POST", "/quote", body=json.dumps(payload), headers=headers)
+    response = conn.getresponse()
+    body = json.loads(response.read())
+    conn.close()
+    return response.status, body
+
+
+def test_quote_matches_price_container():
+    products = {"Basmati Rice": {"quantity": 20, "unit_price": 950}, "Red Lentils": {"quantity": 4, "unit_price": 710}}
+    [result] = quote([{"products": products, "transport": 2400, "packing": 150, "duty": 5, "margin": 15}])
+    assert result["results"] == price_container(products, 2400, 150, 0, 0, 5, 15, 10, 20)
+
+
+@pytest.mark.parametrize("payload, length", [({}, "abc"), ({}, "-1")] + [(payload, None) for payload in [
+    {"containers": "abc"},
+    {"containers": [5]},
+    {"containers": [{"products": "abc"}]},
+    {"containers": [{"products": [5]}]},
+    {"products": {"Rice": {"quantity": None, "unit_price": 10}}},
+    {"products": {"Rice": {"unit_price": 10}}},
+    {"products": {"Rice": {"quantity": "NaN", "unit_price": 10}}},
+    {"products": {"Rice": {"quantity": 1, "unit_price": 10}}, "transport": "inf"},
+    {"products": {"Rice": {"quantity": True, "unit_price": 10}}},
+    {"products": {"Rice": {"quantity": 1e308, "unit_price": 1e308}}},
+    [1, 2],
+]])
+def test_malformed_requests_get_a_json_400(server, payload, length):
+    status, body = post(server, payload, length)
+    assert status == 400
+    assert body["error"].startswith("Invalid quote request")
+
+
+def test_valid_request_over_http(server):
+    status, body = post(server, {"containers": [{"products": [{"product": "Rice", "quantity": 2, "unit_price": 5}]}]})
+    assert status == 200
+    assert body["quotes"][0]["total_product_value"] == 10
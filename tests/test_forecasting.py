@@ -0,0 +1,111 @@
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agro_engine.analytics import LineTable
+from agro_engine.forecasting import ForecastEngine
+from agro_engine.pricing import price_container
+from agro_engine.store import EstimateStore
+
+MONDAY = datetime.date(2024, 1, 1)
+
+
+def estimate(product, destination, week, unit_price, quantity=10.0):
+    products = {product: {"quantity": quantity, "unit_price": unit_price, "total_value": quantity * unit_price}}
+    return {
+        "container_id": f"{product}-{destination}-{week}",
+        "destination": destination,
+        "date": MONDAY + datetime.timedelta(weeks=week),
+        "products": products,
+        "costs": {"transport": 500.0, "packing": 0.0, "fumigation": 0.0, "customs": 0.0, "duty": 5.0},
+        "results": price_container(products, 500.0, 0.0, 0.0, 0.0, 5.0, 15.0, 10.0, 20.0),
+        "status": "active",
+    }
+
+
+def full_refit(store):
+    return ForecastEngine(LineTable(store)).refresh()
+
+
+def assert_same_fit(incremental, full):
+    assert list(incremental.series) == list(full.series)
+    pd.testing.assert_frame_equal(incremental.forecast(horizon=4), full.forecast(horizon=4))
+    for product, destination in full.series:
+        pd.testing.assert_frame_equal(incremental.history(product, destination), full.history(product, destination))
+
+
+@pytest.mark.parametrize("batches", [
+    # A new series after the first fit
+    [[("Rice", "United Kingdom", week, 200.0 + 5 * week) for week in range(6)],
+     [("Oil", "United States", week, 180.0 + week) for week in (6, 7)]],
+    # New buckets well past the previous grid, for old and new series
+    [[("Rice", "United Kingdom", week, 200.0 + 3 * week) for week in range(4)],
+     [("Rice", "United Kingdom", 9, 240.0), ("Oil", "India", 10, 150.0)],
+     [("Oil", "India", 11, 155.0), ("Rice", "United Kingdom", 11, 250.0)]],
+    # Back-dated data before the first bucket
+    [[("Rice", "Japan", week, 300.0 - week) for week in range(3, 6)],
+     [("Rice", "Japan", 1, 310.0), ("Oil", "Japan", 2, 120.0)]],
+])
+def test_incremental_refresh_matches_full_refit(batches):
+    store = EstimateStore(":memory:")
+    engine = ForecastEngine(LineTable(store))
+    for batch in batches:
+        store.add_many([estimate(*row) for row in batch])
+        engine.refresh()
+        assert_same_fit(engine, full_refit(store))
+
+
+def test_new_series_forecasts_from_its_own_data():
+    store = EstimateStore(":memory:")
+    engine = ForecastEngine(LineTable(store))
+    store.add_many([estimate("Rice", "United Kingdom", week, 200.0) for week in range(6)])
+    engine.refresh()
+    store.add_many([estimate("Oil", "United States", week, 205.0) for week in (6, 7)])
+    forecast = engine.refresh().forecast(horizon=1, series=[("Oil", "United States")])
+    unit_retail = 205.0 * (1 + store.query(limit=1)[0]["results"]["margin"] / 100)
+    assert forecast["forecast"].iloc[0] == pytest.approx(unit_retail)
+
+
+def test_updates_trigger_a_full_refit():
+    store = EstimateStore(":memory:")
+    engine = ForecastEngine(LineTable(store))
+    ids = store.add_many([estimate("Rice", "India", week, 100.0 + week) for week in range(5)])
+    engine.refresh()
+    store.delete(ids[-1])
+    engine.refresh()
+    assert_same_fit(engine, full_refit(store))
+    assert np.isfinite(engine.forecast(horizon=1)["forecast"]).all()
+
+
+def test_readers_see_a_consistent_fit_while_another_session_refreshes():
+    store = EstimateStore(":memory:")
+    engine = ForecastEngine(LineTable(store))
+    store.add_many([estimate("Rice", "India", week, 100.0 + week) for week in range(3)])
+    engine.refresh()
+    stop, errors = threading.Event(), []
+
+    def refresh():
+        # Alternate appends (incremental growth) and deletes (full refits)
+        week = 3
+        while not stop.is_set():
+            ids = store.add_many([estimate(product, "India", week, 100.0 + week) for product in ("Rice", "Oil")])
+            engine.refresh()
+            store.delete(ids[-1])
+            engine.refresh()
+            week += 1
+
+    thread = threading.Thread(target=refresh)
+    thread.start()
+    try:
+        for _ in range(300):
+            engine.forecast(horizon=2)
+            engine.history("Rice", "India")
+    except Exception as error:
+        errors.append(error)
+    finally:
+        stop.set()
+        thread.join()
+    assert errors == []
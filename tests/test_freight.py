@@ -0,0 +1,98 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from agro_engine.batch import split_batch
+from agro_engine.freight import DEFAULT_ORIGIN, FreightRates, MockRateProvider, RateTable
+from agro_engine.pricing import price_container, reprice_estimate
+
+RATES = pd.DataFrame({
+    "origin": [DEFAULT_ORIGIN] * 3,
+    "destination": ["Japan"] * 3,
+    "effective_date": ["2025-01-01", "2025-04-01", "2025-07-01"],
+    "rate": [100.0, 110.0, 120.0],
+})
+
+
+@pytest.fixture
+def table():
+    return RateTable(RATES)
+
+
+@pytest.mark.parametrize("date, expected", [
+    (datetime.date(2024, 12, 31), None),
+    (datetime.date(2025, 1, 1), 100.0),
+    (datetime.date(2025, 3, 31), 100.0),
+    (datetime.date(2025, 4, 1), 110.0),
+    (datetime.date(2030, 1, 1), 120.0),
+])
+def test_rate_in_force_on_a_date(table, date, expected):
+    assert table.rate("Japan", date) == expected
+
+
+def test_unknown_route_has_no_rate(table):
+    assert table.rate("Mars", datetime.date(2025, 5, 1)) is None
+    assert table.rate("Japan", datetime.date(2025, 5, 1), origin="China") is None
+
+
+def test_rates_for_matches_scalar_lookups(table):
+    destinations = ["Japan", "Mars", "Japan", "Japan"]
+    dates = ["2019-01-01", "2025-05-01", "2025-07-01", "2025-02-15"]
+    rates = table.rates_for(destinations, dates)
+    expected = [table.rate(d, pd.Timestamp(day).date()) for d, day in zip(destinations, dates)]
+    np.testing.assert_array_equal(rates, [np.nan if r is None else r for r in expected])
+
+
+def test_merged_rates_override_the_same_date(table):
+    merged = table.merged(pd.DataFrame({"origin": [DEFAULT_ORIGIN], "destination": ["Japan"],
+                                        "effective_date": ["2025-04-01"], "rate": [115.0]}))
+    assert merged.rate("Japan", datetime.date(2025, 5, 1)) == 115.0
+    assert merged.rate("Japan", datetime.date(2025, 1, 5)) == 100.0
+    assert table.rate("Japan", datetime.date(2025, 5, 1)) == 110.0
+
+
+def test_reprice_uses_the_rate_of_the_estimate_date(table):
+    products = {"Rice": {"quantity": 10.0, "unit_price": 50.0}}
+    estimate = {"destination": "Japan", "date": datetime.date(2025, 5, 1), "products": products,
+                "costs": {"transport": 0.0, "packing": 0.0, "fumigation": 0.0, "customs": 0.0, "duty": 5.0},
+                "results": price_container(products, 0.0, 0.0, 0.0, 0.0, 5.0, 15.0, 10.0, 20.0)}
+    transport, results = reprice_estimate(estimate, table)
+    assert transport == 1100.0
+    assert results["retail_price"] == pytest.approx(price_container(products, 1100.0, 0.0, 0.0, 0.0, 5.0, 15.0,
+                                                                    10.0, 20.0)["retail_price"])
+    # No rate was in force yet, so there is nothing to re-price against
+    assert reprice_estimate(dict(estimate, date=datetime.date(2019, 1, 1)), table) is None
+
+
+def test_batch_fills_transport_only_where_a_rate_is_in_force(table):
+    df = pd.DataFrame({"container_id": ["A", "B", "C"], "product": ["Rice"] * 3, "quantity": [2.0, 2.0, 2.0],
+                       "unit_price": [10.0] * 3, "destination": ["Japan", "Japan", "Mars"],
+                       "date": ["2025-05-01", "2019-01-01", "2025-05-01"], "transport": [None, None, None]})
+    containers, _ = split_batch(df, table)
+    transport = containers.set_index("container_id")["transport"]
+    assert transport["A"] == 220.0
+    assert transport["B"] == transport["C"] != 220.0
+
+
+def test_mock_feed_has_no_rate_before_its_history():
+    table = RateTable(MockRateProvider(months=12).fetch())
+    assert table.rate("Japan") is not None
+    assert table.rate("Japan", datetime.date(2019, 1, 1)) is None
+
+
+def test_cached_table_is_reused_until_refreshed():
+    calls = []
+
+    class Provider:
+        def fetch(self):
+            calls.append(1)
+            return RATES
+
+    rates = FreightRates(Provider(), ttl=3600)
+    assert rates.table() is rates.table()
+    assert len(calls) == 1
+    rates.refresh()
+    assert len(calls) == 2
+    assert rates.table().rate("Japan", datetime.date(2025, 5, 1)) == 110.0
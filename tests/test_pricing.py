@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agro_engine.batch import estimate_records, price_batch, split_batch
+from agro_engine.pricing import price_arrays, price_container
+
+
+def scalar_chain(products, transport, packing, fumigation, customs, duty, margin, distributor_margin,
+                 retailer_margin):
+    # The original Calculate Estimate code, kept verbatim as the reference
+    total_product_value = sum(p["quantity"] * p["unit_price"] for p in products.values())
+    export_cost = (transport + packing + fumigation + customs) + (total_product_value * duty / 100)
+    fob_price = total_product_value + export_cost
+    importer_price = fob_price * (1 + margin / 100)
+    distributor_price = importer_price * (1 + distributor_margin / 100)
+    retail_price = distributor_price * (1 + retailer_margin / 100)
+    return {
+        "total_value": retail_price,
+        "margin": ((retail_price - total_product_value) / total_product_value * 100) if total_product_value else 0,
+        "fob_price": fob_price,
+        "retail_price": retail_price,
+    }
+
+
+def random_containers(n, seed=0):
+    rng = np.random.default_rng(seed)
+    containers = []
+    for _ in range(n):
+        products = {f"P{j}": {"quantity": round(rng.uniform(0, 40), 2),
+                              "unit_price": round(rng.uniform(100, 2000), 2)}
+                    for j in range(rng.integers(1, 6))}
+        parameters = ([round(rng.uniform(0, 5000), 2) for _ in range(4)]
+                      + [round(rng.uniform(0, 15), 1) for _ in range(4)])
+        containers.append((products, parameters))
+    return containers
+
+
+def test_price_arrays_matches_scalar_chain_exactly():
+    containers = random_containers(300)
+    line_container, quantity, unit_price = [], [], []
+    for i, (products, _) in enumerate(containers):
+        for line in products.values():
+            line_container.append(i)
+            quantity.append(line["quantity"])
+            unit_price.append(line["unit_price"])
+    parameters = list(zip(*(parameters for _, parameters in containers)))
+    priced = price_arrays(line_container, quantity, unit_price, *parameters)
+    for i, (products, container_parameters) in enumerate(containers):
+        expected = scalar_chain(products, *container_parameters)
+        assert {field: float(priced[field][i]) for field in expected} == expected
+
+
+def test_price_container_matches_scalar_chain():
+    for products, parameters in random_containers(50, seed=1):
+        assert price_container(products, *parameters) == scalar_chain(products, *parameters)
+
+
+def test_zero_value_container_has_zero_margin():
+    assert price_container({"Rice": {"quantity": 0, "unit_price": 10}}, 100, 0, 0, 0, 5, 15, 10, 20)["margin"] == 0
+
+
+def test_batch_records_store_the_priced_lines():
+    df = pd.DataFrame({"container_id": ["A", "A", "B"], "product": ["Rice", "Oil", "Rice"],
+                       "quantity": [1.0, 2.0, 3.0], "unit_price": [10.1, 20.3, 5.0], "transport": [100.0, None, 50.0]})
+    containers, lines = split_batch(df)
+    records = estimate_records(price_batch(containers, lines), lines)
+    for record in records:
+        costs = record["costs"]
+        assert record["results"] == scalar_chain(record["products"], costs["transport"], costs["packing"],
+                                                 costs["fumigation"], costs["customs"], costs["duty"], 15, 10, 20)
+
+
+def test_repeated_product_in_a_container_is_rejected():
+    df = pd.DataFrame({"container_id": ["A", "A"], "product": ["Rice", "Rice"],
+                       "quantity": [1.0, 2.0], "unit_price": [10.1, 20.3]})
+    with pytest.raises(ValueError, match="more than once"):
+        split_batch(df)
+    lines = df[["container_id", "product", "quantity", "unit_price"]]
+    with pytest.raises(ValueError, match="more than once"):
+        price_batch(pd.DataFrame({"container_id": ["A"]}), lines)
@@ -0,0 +1,38 @@
+import io
+import posixpath
+import zipfile
+
+import pytest
+
+from agro_engine.reports import report_filename, write_reports_zip
+
+
+def estimate(container_id):
+    return {"container_id": container_id,
+            "products": {"Rice": {"quantity": 2.0, "unit_price": 10.0, "total_value": 20.0}},
+            "results": {"total_value": 30.0, "margin": 50.0, "fob_price": 22.0, "retail_price": 30.0}}
+
+
+@pytest.mark.parametrize("container_id, filename", [
+    ("CONT-001", "CONT-001_report.pdf"),
+    ("MSKU 123.4", "MSKU_123.4_report.pdf"),
+    ("../../etc/passwd", "_.._etc_passwd_report.pdf"),
+    ("..\\boot.ini", "_boot.ini_report.pdf"),
+    ("/abs", "_abs_report.pdf"),
+    ("..", "estimate_report.pdf"),
+    (42, "42_report.pdf"),
+])
+def test_report_filename_is_a_plain_file_name(container_id, filename):
+    assert report_filename({"container_id": container_id}) == filename
+
+
+def test_bulk_zip_entries_stay_inside_the_archive():
+    pytest.importorskip("reportlab")
+    ids = ["A", "../A", "A", "/tmp/x", "C:\\x", "..", "ok"]
+    buffer = io.BytesIO()
+    assert write_reports_zip([estimate(i) for i in ids], "tester", buffer, max_workers=1) == len(ids)
+    names = zipfile.ZipFile(buffer).namelist()
+    assert len(set(names)) == len(ids)
+    for name in names:
+        assert "/" not in name and "\\" not in name and not name.startswith(".")
+        assert posixpath.normpath(name) == name
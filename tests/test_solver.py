@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from agro_engine.freight import MockRateProvider, RateTable
+from agro_engine.pricing import price_arrays
+from agro_engine.solver import buying_grid, solve_max_price
+
+
+def random_cells(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "quantity": rng.uniform(1, 30, n),
+        "fixed_costs": rng.uniform(0, 5000, n),
+        "duty": rng.uniform(0, 15, n),
+        "margins": [rng.uniform(0, 30, n) for _ in range(3)],
+        "base_value": np.where(rng.random(n) < 0.5, 0.0, rng.uniform(0, 50_000, n)),
+    }
+
+
+def forward(cells, price, rows):
+    # One container per cell: the lines already loaded (one unit at base_value) plus the solved line
+    n = len(rows)
+    priced = price_arrays(np.concatenate([np.arange(n), np.arange(n)]),
+                          np.concatenate([np.ones(n), cells["quantity"][rows]]),
+                          np.concatenate([cells["base_value"][rows], price[rows]]),
+                          cells["fixed_costs"][rows], np.zeros(n), np.zeros(n), np.zeros(n), cells["duty"][rows],
+                          *(margin[rows] for margin in cells["margins"]))
+    line_value = cells["quantity"][rows] * price[rows]
+    line_retail = priced["retail_price"] * line_value / priced["total_product_value"] / cells["quantity"][rows]
+    return line_retail, priced["margin"]
+
+
+def solve(cells, target, kind):
+    return solve_max_price(target, cells["quantity"], cells["fixed_costs"], cells["duty"], *cells["margins"],
+                           kind=kind, base_value=cells["base_value"])
+
+
+def test_retail_target_round_trips_through_the_forward_chain():
+    cells = random_cells(5000)
+    target = np.random.default_rng(1).uniform(500, 5000, 5000)
+    price = solve(cells, target, "retail_price")
+    rows = np.flatnonzero(np.isfinite(price))
+    assert len(rows) > 4000
+    line_retail, _ = forward(cells, price, rows)
+    np.testing.assert_allclose(line_retail, target[rows], rtol=1e-8)
+    # The bisection never overshoots the target
+    assert (line_retail <= target[rows] * (1 + 1e-12)).all()
+
+
+def test_margin_target_round_trips_through_the_forward_chain():
+    cells = random_cells(5000, seed=2)
+    target = np.random.default_rng(3).uniform(40, 150, 5000)
+    price = solve(cells, target, "margin")
+    rows = np.flatnonzero(np.isfinite(price))
+    _, margin = forward(cells, price, rows)
+    np.testing.assert_allclose(margin, target[rows], atol=1e-9)
+    # inf: the mark-up chain alone already beats the target margin
+    markup = np.prod([1 + m / 100 for m in cells["margins"]], axis=0) * (1 + cells["duty"] / 100)
+    unbounded = np.isinf(price)
+    assert unbounded.any()
+    assert (markup[unbounded] - 1 >= target[unbounded] / 100).all()
+
+
+def test_scalar_arguments_broadcast():
+    price = solve_max_price(1500.0, 20.0, 2000.0, 5.0, 15.0, 10.0, 20.0, base_value=5000.0)
+    assert price.shape == ()
+    assert float(price) > 0
+    closed = solve_max_price(1500.0, 20.0, 2000.0, 5.0, 15.0, 10.0, 20.0)
+    assert float(closed) == pytest.approx((1500 / (1.15 * 1.1 * 1.2) - 100) / 1.05)
+    assert solve_max_price([1500.0, 1600.0], 20.0, [[0.0], [2000.0]], 5.0, 15.0, 10.0, 20.0).shape == (2, 2)
+
+
+@pytest.mark.parametrize("kind, target", [("retail_price", 1500.0), ("margin", 60.0)])
+@pytest.mark.parametrize("base_value", [0.0, 5000.0])
+def test_missing_inputs_give_nan(kind, target, base_value):
+    price = solve_max_price([np.nan, target, target], 20.0, [100.0, np.nan, 100.0], 5.0, 15.0, 10.0, 20.0,
+                            kind=kind, base_value=base_value)
+    assert np.isnan(price[:2]).all()
+    assert not np.isnan(price[2])
+
+
+def test_grid_leaves_unknown_routes_blank():
+    rates = RateTable(MockRateProvider().fetch())
+    targets = pd.DataFrame({"product": ["Rice", "Rice"], "destination": ["Japan", "Mars"], "target": [1500.0] * 2})
+    scenarios = pd.DataFrame({"scenario": ["Base"], "margin": [15.0], "distributor_margin": [10.0],
+                              "retailer_margin": [20.0]})
+    for base_value in (0.0, 5000.0):
+        grid = buying_grid(targets, scenarios, rates, base_value=base_value, base_quantity=10.0)
+        assert np.isfinite(grid.loc[grid["destination"] == "Japan", "max_unit_price"]).all()
+        assert grid.loc[grid["destination"] == "Mars", "max_unit_price"].isna().all()
@@ -0,0 +1,122 @@
+import io
+import threading
+
+import pytest
+
+from agro_engine.catalog import ProductCatalog
+from agro_engine.history_io import export_history, import_history
+from agro_engine.store import EstimateStore
+from benchmarks.synthetic import iter_estimate_chunks
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "estimates.db")
+
+
+def load(store, n, seed=0):
+    for chunk in iter_estimate_chunks(n, seed=seed):
+        store.add_many(chunk)
+
+
+def test_appends_from_another_connection_update_the_aggregates(path):
+    store, other = EstimateStore(path), EstimateStore(path)
+    load(store, 50)
+    mutations = store.mutations
+    load(other, 30, seed=1)
+    assert store.aggregates.count == 80
+    assert store.verify_aggregates() == []
+    # Appends are picked up by line id, so derived tables need no full reload
+    assert store.mutations == mutations
+
+
+def test_updates_and_deletes_from_another_connection_rebuild(path):
+    store, other = EstimateStore(path), EstimateStore(path)
+    load(store, 50)
+    first = store.query(limit=1, order_by="date", descending=False)[0]
+    mutations = store.mutations
+    other.set_status(first["id"], "closed")
+    assert store.aggregates.status_count("closed") == 1
+    assert store.mutations > mutations
+    assert "closed" in store.distinct("status")
+    other.delete(first["id"])
+    assert store.aggregates.count == 49
+    assert store.verify_aggregates() == []
+
+
+def test_own_writes_and_catalog_edits_do_not_force_a_reload(path):
+    store = EstimateStore(path)
+    load(store, 20)
+    store.set_status(store.query(limit=1)[0]["id"], "closed")
+    mutations = store.mutations
+    load(store, 5, seed=2)
+    ProductCatalog(path).upsert("Teff", "Millets", "MT")
+    assert store.mutations == mutations
+    assert store.aggregates.count == 25
+    assert store.verify_aggregates() == []
+
+
+def test_distinct_follows_appends(path):
+    store = EstimateStore(path)
+    load(store, 20)
+    before = store.distinct("product")
+    estimate = store.query(limit=1)[0]
+    estimate["products"] = {"Teff": {"quantity": 1.0, "unit_price": 2.0, "total_value": 2.0}}
+    store.add(estimate)
+    assert store.distinct("product") == sorted(before + ["Teff"])
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "arrow"])
+def test_history_round_trip(path, fmt):
+    if fmt != "csv":
+        pytest.importorskip("pyarrow")
+    store = EstimateStore(path)
+    load(store, 300)
+    buffer = io.BytesIO()
+    rows = export_history(store, buffer, fmt, chunk_size=97)
+    buffer.seek(0)
+    copy = EstimateStore(":memory:")
+    summary = import_history(copy, buffer, fmt, chunk_size=41)
+    assert summary["lines"] == rows and summary["estimates"] == 300
+    strip = [{k: v for k, v in e.items() if k != "id"} for e in store.query(order_by="date", descending=False)]
+    assert strip == [{k: v for k, v in e.items() if k != "id"} for e in copy.query(order_by="date", descending=False)]
+    assert copy.verify_aggregates() == []
+
+
+def test_concurrent_writers_on_one_file(path):
+    # The CLI (`price --save`, `import`) can write while the app is up
+    stores = [EstimateStore(path) for _ in range(2)]
+    chunks = [list(iter_estimate_chunks(200, chunk_size=5, seed=seed)) for seed in range(2)]
+    errors = []
+
+    def write(store, store_chunks):
+        try:
+            for chunk in store_chunks:
+                store.add_many(chunk)
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=write, args=args) for args in zip(stores, chunks)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    for store in stores:
+        assert store.aggregates.count == 400
+        assert store.verify_aggregates() == []
+
+
+@pytest.mark.parametrize("search, expected", [
+    ("CONT_1", ["CONT_1"]),
+    ("50%", ["LOT-50%"]),
+    ("a\\b", ["a\\b"]),
+    ("CONT", ["CONTX1", "CONT_1"]),
+])
+def test_container_search_is_a_plain_substring(search, expected):
+    store = EstimateStore(":memory:")
+    template = next(iter_estimate_chunks(1))[0]
+    store.add_many([dict(template, container_id=cid) for cid in ("CONT_1", "CONTX1", "LOT-50%", "LOT-500", "a\\b", "ab")])
+    found = [e["container_id"] for e in store.query(container_id=search, order_by="container_id", descending=False)]
+    assert found == expected
+    assert store.count(container_id=search) == len(expected)